@@ -8,6 +8,7 @@
 from __future__ import unicode_literals
 import sys
 import base64
+import copy
 import io
 import logging
 import mimetypes
@@ -15,9 +16,9 @@ import os
 import uuid
 import re
 
-from copy import deepcopy
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
 
-import jinja2
 import lxml.html
 
 from lxml import etree
@@ -26,7 +27,7 @@ from .epub import EPUB, Package, Item
 from .formatters import HTMLFormatter
 from .models import (
     flatten_model, flatten_to_documents,
-    content_to_etree, etree_to_content,
+    content_to_etree,
     Binder, TranslucentBinder,
     Document, Resource, DocumentPointer, CompositeDocument,
     TRANSLUCENT_BINDER_ID,
@@ -44,12 +45,13 @@ logger = logging.getLogger('cnxepub')
 
 
 __all__ = (
-    'adapt_package', 'adapt_item',
+    'inspect_epub',
+    'adapt_epub', 'adapt_package', 'adapt_item',
     'get_model_extensions',
     'make_epub', 'make_publication_epub',
     'BinderItem',
     'DocumentItem',
-    'adapt_single_html',
+    'adapt_single_html', 'adapt_single_html_stream',
     )
 
 
@@ -57,39 +59,168 @@ class AdaptationError(Exception):
     """Raised when data is not able to be adapted to the requested format."""
 
 
-def adapt_package(package):
+def inspect_epub(file):
+    """Read the metadata and navigation tree of each package in
+    the given EPUB ``file`` (see ``.epub.EPUB.from_file``).
+    Only the ``container.xml``, the OPF files and the navigation documents
+    are read. No other item is loaded and nothing is adapted.
+    Returns a list of dictionaries containing the package's
+    ``name``, ``metadata`` and navigation ``tree``, in container order.
+    """
+    packages = []
+    with EPUB.from_file(file, extract=False) as epub:
+        for package in epub:
+            navigation_item = package.navigation
+            html = etree.parse(navigation_item.data)
+            navigation_item.release()
+            packages.append({
+                'name': package.name,
+                'metadata': package.metadata,
+                'tree': parse_navigation_html_to_tree(html,
+                                                      navigation_item.name),
+                })
+    return packages
+
+
+def adapt_epub(epub, workers=1):
+    """Adapts each ``.epub.Package`` in the given ``.epub.EPUB``
+    (see ``adapt_package``) and returns the resulting binders
+    in container order.
+    When ``workers`` is more than one, the packages are adapted
+    in a pool of threads.
+    """
+    packages = list(epub)
+    if workers > 1 and len(packages) > 1:
+        pool = ThreadPool(min(workers, len(packages)))
+        try:
+            return pool.map(adapt_package, packages)
+        finally:
+            pool.terminate()
+    return [adapt_package(package) for package in packages]
+
+
+def adapt_package(package, workers=1, release_items=False):
     """Adapts ``.epub.Package`` to a ``BinderItem`` and cascades
     the adaptation downward to ``DocumentItem``
     and ``ResourceItem``.
     The results of this process provide the same interface as
     ``.models.Binder``, ``.models.Document`` and ``.models.Resource``.
+    When ``workers`` is more than one, the pages are parsed in a pool
+    of threads before the models are put together in navigation order.
+    Parsing errors are still raised in that order.
+    The adapted models don't hold on to the package's items.
+    With ``release_items`` set, the data the items loaded is dropped
+    once adaptation is done (see ``.epub.Item.release``).
     """
     navigation_item = package.navigation
     html = etree.parse(navigation_item.data)
     tree = parse_navigation_html_to_tree(html, navigation_item.name)
-    return _node_to_model(tree, package)
+    # The navigation document is also the binder's page.
+    pages = {navigation_item.name: (html, None)}
+    if workers > 1:
+        pages.update(_parse_pages(tree, package, workers))
+    # Each resource is adapted once, however many pages reference it.
+    binder = _node_to_model(tree, package, pages=pages, resource_cache={})
+    if release_items:
+        for item in package:
+            item.release()
+    return binder
 
 
-def adapt_item(item, package, filename=None):
-    """Adapts ``.epub.Item`` to a ``DocumentItem``.
+def _parse_html(item):
+    # Namespaces are cleaned up here, as ``.models.content_to_etree`` does,
+    # because the tree goes on to become the document's content.
+    return etree.parse(item.data, etree.XMLParser(ns_clean=True))
+
 
+def _parse_page(item):
+    """Parse a page, capturing the error to be raised later on."""
+    try:
+        html = _parse_html(item)
+    except Exception as exc:
+        return None, exc
+    item.data.seek(0)
+    return html, None
+
+
+def _pop_page(pages, item):
+    """Take the item's tree out of the pages parsed in advance,
+    raising the error that parsing it produced.
+    Each tree is only used once, repeated pages are parsed again.
     """
-    if item.media_type == 'application/xhtml+xml':
+    if not pages or item.name not in pages:
+        return None
+    html, exc = pages.pop(item.name)
+    if exc is not None:
+        logger.error("failed parsing {}".format(item.name))
+        raise exc
+    return html
+
+
+def _parse_pages(tree, package, workers):
+    """Parse the pages in the navigation ``tree`` in a pool of threads.
+    Returns a mapping of item names to ``(html, exception)``.
+    """
+    items = []
+    names = set()
+    # A stack of the nodes still to be visited, the next one last
+    pending = [tree]
+    while pending:
+        node = pending.pop()
+        if 'contents' in node:
+            pending.extend(reversed(node['contents']))
+            continue
+        if node['id'] in names:
+            continue
         try:
-            html = etree.parse(item.data)
-        except Exception as exc:
-            logger.error("failed parsing {}".format(item.name))
-            raise
+            item = package.grab_by_name(node['id'])
+        except KeyError:
+            # Raised again in order, while adapting.
+            continue
+        if item.media_type == 'application/xhtml+xml':
+            items.append(item)
+            names.add(item.name)
+    if not items:
+        return {}
+    pool = ThreadPool(min(workers, len(items)))
+    try:
+        results = pool.map(_parse_page, items)
+    finally:
+        pool.terminate()
+    return dict(zip([item.name for item in items], results))
+
+
+def adapt_item(item, package, filename=None, html=None,
+               resource_cache=None):
+    """Adapts ``.epub.Item`` to a ``DocumentItem``.
+    ``html`` is the item's already parsed tree, if there is one.
+    ``resource_cache`` is a mapping of item name and filename
+    to the ``Resource`` adapted for them, which is given again
+    rather than adapting the item another time.
+    """
+    if item.media_type == 'application/xhtml+xml':
+        if html is None:
+            try:
+                html = _parse_html(item)
+            except Exception as exc:
+                logger.error("failed parsing {}".format(item.name))
+                raise
         metadata = DocumentPointerMetadataParser(
             html, raise_value_error=False)()
         item.data.seek(0)
         if metadata.get('is_document_pointer'):
-            model = DocumentPointerItem(item, package)
+            model = DocumentPointerItem(item, package, html=html)
         else:
-            model = DocumentItem(item, package)
+            model = DocumentItem(item, package, html=html,
+                                 resource_cache=resource_cache)
     else:
-        model = Resource(item.name, item.data, item.media_type,
-                         filename or item.name)
+        filename = filename or item.name
+        key = (item.name, filename,)
+        if resource_cache is not None and key in resource_cache:
+            return resource_cache[key]
+        model = Resource(item.name, item.data, item.media_type, filename)
+        if resource_cache is not None:
+            resource_cache[key] = model
     return model
 
 
@@ -111,9 +242,8 @@ def make_publication_epub(binders, publisher, publication_message, file):
     packages = []
     for binder in binders:
         metadata = binder.metadata
-        binder.metadata = deepcopy(metadata)
-        binder.metadata.update({'publisher': publisher,
-                                'publication_message': publication_message})
+        binder.metadata = dict(metadata, publisher=publisher,
+                               publication_message=publication_message)
         packages.append(_make_package(binder))
         binder.metadata = metadata
     epub = EPUB(packages)
@@ -136,17 +266,22 @@ def get_model_extensions(binder):
 
 
 def _make_package(binder):
-    """Makes an ``.epub.Package`` from a  Binder'ish instance."""
+    """Makes an ``.epub.Package`` from a  Binder'ish instance.
+    Resources with the same data and media-type are packaged once.
+    Of resources with the same name but different data,
+    only the first is packaged.
+    """
     package_id = binder.id
     if package_id is None:
         package_id = hash(binder)
 
     package_name = "{}.opf".format(package_id)
+    # Resources are deduplicated and references rebound in a copy,
+    # leaving the given binder as it is.
+    binder = binder.clone()
 
     extensions = get_model_extensions(binder)
 
-    template_env = jinja2.Environment(trim_blocks=True, lstrip_blocks=True)
-
     # Build the package item list.
     items = []
     # Build the binder as an item, specifically a navigation item.
@@ -159,20 +294,57 @@ def _make_package(binder):
                 'application/xhtml+xml',
                 is_navigation=True, properties=['nav'])
     items.append(item)
+    item_names = set([item.name])
+    # The packaged resources by id and by the hash of their data
+    # along with their media-type
     resources = {}
-    # Roll through the model list again, making each one an item.
-    for model in flatten_model(binder):
-        for resource in getattr(model, 'resources', []):
-            resources[resource.id] = resource
+    resources_by_hash = {}
+    # The resources of the models, mapped to the one packaged for them
+    packaged_resources = {}
+
+    def package_resource(resource):
+        """Makes an item of the resource, unless it or its data is
+        packaged already. Returns the resource that is packaged.
+        """
+        if resource in packaged_resources:
+            return packaged_resources[resource]
+        key = (resource.hash, resource.media_type,)
+        packaged = resources_by_hash.get(key)
+        if packaged is None and resource.id in resources:
+            packaged = resources[resource.id]
+            logger.warning('Resource {} is packaged once, with the data '
+                           'of the first resource of that name'
+                           .format(resource.id))
+        if packaged is None:
+            packaged = resources[resource.id] = resource
+            resources_by_hash[key] = resource
             with resource.open() as data:
                 item = Item(resource.id, data, resource.media_type)
             items.append(item)
+        else:
+            # References by the name of a duplicate go to the packaged one.
+            resources.setdefault(resource.id, packaged)
+        packaged_resources[resource] = packaged
+        return packaged
+
+    # Roll through the model list again, making each one an item.
+    for model in flatten_model(binder):
+        model_resources = getattr(model, 'resources', [])
+        for i, resource in enumerate(model_resources):
+            packaged = package_resource(resource)
+            if packaged is not resource:
+                model_resources[i] = packaged
 
         if isinstance(model, (Binder, TranslucentBinder,)):
             continue
+        item_name = ''.join([model.ident_hash, extensions[model.id]])
+        if item_name in item_names:
+            # The same document is in the binder more than once.
+            continue
+        item_names.add(item_name)
         if isinstance(model, DocumentPointer):
             content = bytes(HTMLFormatter(model))
-            item = Item(''.join([model.ident_hash, extensions[model.id]]),
+            item = Item(item_name,
                         io.BytesIO(content),
                         model.media_type)
             items.append(item)
@@ -182,12 +354,10 @@ def _make_package(binder):
                 # has side effects - converts ref type to INTERNAL w/
                 # appropriate uri, so need to replicate resource treatment from
                 # above
-                resource = _make_resource_from_inline(reference)
-                model.resources.append(resource)
-                resources[resource.id] = resource
-                with resource.open() as data:
-                    item = Item(resource.id, data, resource.media_type)
-                items.append(item)
+                resource = package_resource(
+                    _make_resource_from_inline(reference))
+                if resource not in model.resources:
+                    model.resources.append(resource)
                 reference.bind(resource, '../resources/{}')
 
             elif reference.remote_type == INTERNAL_REFERENCE_TYPE:
@@ -197,7 +367,7 @@ def _make_package(binder):
                     reference.bind(resource, '../resources/{}')
 
         complete_content = bytes(HTMLFormatter(model))
-        item = Item(''.join([model.ident_hash, extensions[model.id]]),
+        item = Item(item_name,
                     io.BytesIO(complete_content),
                     model.media_type)
         items.append(item)
@@ -211,9 +381,7 @@ def _make_resource_from_inline(reference):
     """Makes an ``models.Resource`` from a ``models.Reference``
        of type INLINE. That is, a data: uri"""
     uri = DataURI(reference.uri)
-    data = io.BytesIO(uri.data)
-    mimetype = uri.mimetype
-    res = Resource('dummy', data, mimetype)
+    res = Resource('dummy', uri.open(), uri.mimetype)
     res.id = res.filename
     return res
 
@@ -227,8 +395,12 @@ def _make_item(model):
 
 
 def _node_to_model(tree_or_item, package, parent=None,
-                   lucent_id=TRANSLUCENT_BINDER_ID):
-    """Given a tree, parse to a set of models"""
+                   lucent_id=TRANSLUCENT_BINDER_ID, pages=None,
+                   resource_cache=None):
+    """Given a tree, parse to a set of models.
+    ``pages`` are the pages parsed in advance (see ``_parse_pages``).
+    ``resource_cache`` is passed on to ``adapt_item``.
+    """
     if 'contents' in tree_or_item:
         # It is a binder.
         tree = tree_or_item
@@ -240,7 +412,9 @@ def _node_to_model(tree_or_item, package, parent=None,
         else:
             try:
                 package_item = package.grab_by_name(tree['id'])
-                binder = BinderItem(package_item, package)
+                binder = BinderItem(package_item, package,
+                                    html=_pop_page(pages, package_item),
+                                    resource_cache=resource_cache)
             except KeyError:  # Translucent w/ id
                 metadata.update({
                    'title': tree['title'],
@@ -249,7 +423,8 @@ def _node_to_model(tree_or_item, package, parent=None,
                 binder = Binder(tree['id'], metadata=metadata)
         for item in tree['contents']:
             node = _node_to_model(item, package, parent=binder,
-                                  lucent_id=lucent_id)
+                                  lucent_id=lucent_id, pages=pages,
+                                  resource_cache=resource_cache)
             if node.metadata['title'] != item['title']:
                 binder.set_title_for_node(node, item['title'])
         result = binder
@@ -257,7 +432,9 @@ def _node_to_model(tree_or_item, package, parent=None,
         # It is a document.
         item = tree_or_item
         package_item = package.grab_by_name(item['id'])
-        result = adapt_item(package_item, package)
+        result = adapt_item(package_item, package,
+                            html=_pop_page(pages, package_item),
+                            resource_cache=resource_cache)
     if parent is not None:
         parent.append(result)
     return result
@@ -273,14 +450,14 @@ def _id_from_metadata(metadata):
 
 class BinderItem(Binder):
 
-    def __init__(self, item, package):
-        self._item = item
-        self._package = package
-        html = etree.parse(self._item.data)
+    def __init__(self, item, package, html=None, resource_cache=None):
+        if html is None:
+            html = etree.parse(item.data)
         metadata = parse_metadata(html)
         resources = [
             adapt_item(package.grab_by_name(resource['id']),
-                       package, resource['filename'])
+                       package, resource['filename'],
+                       resource_cache=resource_cache)
             for resource in parse_resources(html)]
         id = _id_from_metadata(metadata)
         super(BinderItem, self).__init__(
@@ -289,28 +466,25 @@ class BinderItem(Binder):
 
 class DocumentPointerItem(DocumentPointer):
 
-    def __init__(self, item, package):
-        self._item = item
-        self._package = package
-        self._html = etree.parse(self._item.data)
+    def __init__(self, item, package, html=None):
+        if html is None:
+            html = _parse_html(item)
 
-        metadata = DocumentPointerMetadataParser(self._html)()
+        metadata = DocumentPointerMetadataParser(html)()
         id = _id_from_metadata(metadata)
         super(DocumentPointerItem, self).__init__(id, metadata=metadata)
 
 
 class DocumentItem(Document):
 
-    def __init__(self, item, package):
-        self._item = item
-        self._package = package
-        self._html = etree.parse(self._item.data)
+    def __init__(self, item, package, html=None, resource_cache=None):
+        if html is None:
+            html = _parse_html(item)
 
-        metadata = parse_metadata(self._html)
-        body = self._html.xpath('//xhtml:body',
-                                namespaces=HTML_DOCUMENT_NAMESPACES)[0]
-        metadata_nodes = self._html.xpath(
-                                    "//xhtml:body/*[@data-type='metadata']",
+        metadata = parse_metadata(html)
+        body = html.xpath('//xhtml:body',
+                          namespaces=HTML_DOCUMENT_NAMESPACES)[0]
+        metadata_nodes = html.xpath("//xhtml:body/*[@data-type='metadata']",
                                     namespaces=HTML_DOCUMENT_NAMESPACES)
         for node in metadata_nodes:
             body.remove(node)
@@ -318,11 +492,15 @@ class DocumentItem(Document):
             if key in ('itemtype', 'itemscope'):
                 body.attrib.pop(key)
 
-        content = etree.tostring(self._html)
-
         id = _id_from_metadata(metadata)
-        resources = None
-        super(DocumentItem, self).__init__(id, content, metadata)
+        # The body's contents are moved into a tree of their own,
+        # without reparsing, so the rest of the page can be let go of.
+        # All of the namespaces in scope are kept, as serializing does.
+        content = etree.Element(body.tag, body.attrib, nsmap=body.nsmap)
+        content.text, content.tail = body.text, body.tail
+        content.extend(body)
+        body = content
+        super(DocumentItem, self).__init__(id, body, metadata)
 
         # Based on the reference list, make a best effort
         # to acquire resources.
@@ -334,7 +512,8 @@ class DocumentItem(Document):
                 continue
             name = os.path.basename(ref.uri)
             try:
-                resource = adapt_item(package.grab_by_name(name), package)
+                resource = adapt_item(package.grab_by_name(name), package,
+                                      resource_cache=resource_cache)
                 ref.bind(resource, '../resources/{}')
                 resources.append(resource)
             except KeyError:
@@ -345,9 +524,16 @@ class DocumentItem(Document):
         self.resources = resources
 
 
-def adapt_single_html(html):
+def adapt_single_html(html, workers=1, id_map=None):
     """Adapts a single html document generated by
     ``.formatters.SingleHTMLFormatter`` to a ``models.Binder``
+
+    With more than one of ``workers``, the top level units and chapters
+    are adapted in a pool of that many processes.
+
+    ``id_map`` is the id map of the formatter
+    (see ``.formatters.SingleHTMLFormatter.id_map``). The original ids
+    of the elements it lists are then looked up rather than guessed at.
     """
     html_root = etree.fromstring(html)
 
@@ -358,224 +544,513 @@ def adapt_single_html(html):
     nav_tree = parse_navigation_html_to_tree(html_root, id_)
 
     body = html_root.xpath('//xhtml:body', namespaces=HTML_DOCUMENT_NAMESPACES)
-    _adapt_single_html_tree(binder, body[0], nav_tree, top_metadata=metadata)
+    if workers > 1:
+        pool = Pool(workers)
+        try:
+            _adapt_single_html_tree_in_pool(binder, body[0], nav_tree,
+                                            metadata, pool, id_map)
+        finally:
+            pool.terminate()
+    else:
+        _adapt_single_html_tree(binder, body[0], nav_tree,
+                                top_metadata=metadata,
+                                generated_ids=id_map)
 
     return binder
 
 
-def _adapt_single_html_tree(parent, elem, nav_tree, top_metadata,
-                            id_map=None, depth=0):
-    title_overrides = [i.get('title') for i in nav_tree['contents']]
+def _fix_generated_ids(page, id_map, generated_ids=None):
+    """Fix element ids (remove auto marker) and populate id_map.
+    The original ids of the ``generated_ids`` known from the formatter
+    are used as they are. The page's tree is changed in place.
+    """
+    content = page._xml
+    if generated_ids is None:
+        generated_ids = {}
+
+    new_ids = set()
+    suffix = 0
+    for element in content.xpath('.//*[@id]'):
+        id_val = element.get('id')
+        if id_val in generated_ids:
+            new_val = generated_ids[id_val][1]
+        elif id_val.startswith('auto_'):
+            # It's possible that an auto_ prefix was injected using a page
+            # ID that incorporated the page_ prefix. We'll remove that
+            # first if it exists so the auto prefixing fix works whether
+            # it is present or not.
+            new_val = re.sub(r'^auto_page_', 'auto_', id_val)
+
+            # We max split with two to avoid breaking up ID values that
+            # may have originally included '_' and only undo the auto_{id}_
+            # prefixing injected by a formatter
+            new_val = new_val.split('_', 2)[-1]
+        else:
+            new_val = id_val
+        # Did content from different pages w/ same original id
+        # get moved to the same page?
+        if id_val.startswith('auto_') and new_val in new_ids:
+            while (new_val + str(suffix)) in new_ids:
+                suffix += 1
+            new_val = new_val + str(suffix)
+        new_ids.add(new_val)
+        element.set('id', new_val)
+        if id_val.startswith('page_'):
+            # We want to map any references to the generated page ID
+            # directly to the page
+            id_map['#{}'.format(id_val)] = (page, '')
+        else:
+            id_map['#{}'.format(id_val)] = (page, new_val)
 
-    # A dictionary to allow look up of a document and new id using the old html
-    # element id
+    id_map['#{}'.format(page.id)] = (page, '')
+    if page.id and '@' in page.id:
+        id_map['#{}'.format(page.id.split('@')[0])] = (page, '')
 
-    if id_map is None:
-        id_map = {}
+    page.mark_dirty()
 
-    def fix_generated_ids(page, id_map):
-        """Fix element ids (remove auto marker) and populate id_map."""
-
-        content = content_to_etree(page.content)
-
-        new_ids = set()
-        suffix = 0
-        for element in content.xpath('.//*[@id]'):
-            id_val = element.get('id')
-            if id_val.startswith('auto_'):
-                # It's possible that an auto_ prefix was injected using a page
-                # ID that incorporated the page_ prefix. We'll remove that
-                # first if it exists so the auto prefixing fix works whether
-                # it is present or not.
-                new_val = re.sub(r'^auto_page_', 'auto_', id_val)
-
-                # We max split with two to avoid breaking up ID values that
-                # may have originally included '_' and only undo the auto_{id}_
-                # prefixing injected by a formatter
-                new_val = new_val.split('_', 2)[-1]
-                # Did content from different pages w/ same original id
-                # get moved to the same page?
-                if new_val in new_ids:
-                    while (new_val + str(suffix)) in new_ids:
-                        suffix += 1
-                    new_val = new_val + str(suffix)
-            else:
-                new_val = id_val
-            new_ids.add(new_val)
-            element.set('id', new_val)
-            if id_val.startswith('page_'):
-                # We want to map any references to the generated page ID
-                # directly to the page
-                id_map['#{}'.format(id_val)] = (page, '')
+
+def _fix_links(page, id_map):
+    """Remap all intra-book links, replace with value from id_map.
+    The page's tree is changed in place.
+    """
+    content = page._xml
+    for i in content.xpath('.//*[starts-with(@href, "#")]',
+                           namespaces=HTML_DOCUMENT_NAMESPACES):
+        ref_val = i.attrib['href']
+        if ref_val in id_map:
+            target_page, target = id_map[ref_val]
+            if page is target_page:
+                i.attrib['href'] = '#{}'.format(target)
             else:
-                id_map['#{}'.format(id_val)] = (page, new_val)
+                target_id = target_page.id.split('@')[0]
+                if not target:  # link to page
+                    i.attrib['href'] = '/contents/{}'.format(target_id)
+                else:
+                    i.attrib['href'] = '/contents/{}#{}'.format(
+                        target_id, target)
+        else:
+            logger.error('Bad href: {}'.format(ref_val))
 
-        id_map['#{}'.format(page.id)] = (page, '')
-        if page.id and '@' in page.id:
-            id_map['#{}'.format(page.id.split('@')[0])] = (page, '')
+    page.mark_dirty()
 
-        page.content = etree_to_content(content)
 
-    def fix_links(page, id_map):
-        """Remap all intra-book links, replace with value from id_map."""
+def _compute_id(p, elem, key):
+    """Compute id and shortid from parent uuid and child attr"""
+    p_ids = [p.id.split('@')[0]]
+    if 'cnx-archive-uri' in p.metadata and p.metadata['cnx-archive-uri']:
+        p_ids.insert(0, p.metadata['cnx-archive-uri'].split('@')[0])
 
-        content = content_to_etree(page.content)
-        for i in content.xpath('.//*[starts-with(@href, "#")]',
-                               namespaces=HTML_DOCUMENT_NAMESPACES):
-            ref_val = i.attrib['href']
-            if ref_val in id_map:
-                target_page, target = id_map[ref_val]
-                if page == target_page:
-                        i.attrib['href'] = '#{}'.format(target)
-                else:
-                    target_id = target_page.id.split('@')[0]
-                    if not target:  # link to page
-                        i.attrib['href'] = '/contents/{}'.format(target_id)
-                    else:
-                        i.attrib['href'] = '/contents/{}#{}'.format(
-                            target_id, target)
+    for p_id in p_ids:
+        try:
+            p_uuid = uuid.UUID(p_id)
+            break
+        except ValueError:
+            pass
+    else:  # Punt - no parent uuid, make one up for child
+        return str(uuid.uuid4())
+
+    uuid_key = elem.get('data-uuid-key', elem.get('class', key))
+    if (sys.version_info.major == 2):  # https://bugs.python.org/issue34145
+        uuid_key = uuid_key.encode('utf-8')
+    return str(uuid.uuid5(p_uuid, uuid_key))
+
+
+def _compute_shortid(ident_hash):
+    """Compute shortId from uuid or ident_hash"""
+    ver = None
+    if '@' in ident_hash:
+        (id_str, ver) = ident_hash.split('@')
+    else:
+        id_str = ident_hash
+    try:
+        id_uuid = uuid.UUID(id_str)
+    except ValueError:
+        # id is not a uuid, no shortid
+        return None
+
+    shortid = (base64.urlsafe_b64encode(id_uuid.bytes)[:8]).decode('utf-8')
+    if ver:
+        return '@'.join((shortid, ver))
+    else:
+        return shortid
+
+
+def adapt_single_html_stream(file, id_map=None):
+    """Adapts a single html document, as ``adapt_single_html`` does,
+    while reading it incrementally from ``file``, a file-like object
+    or path. Each page is made into a document as soon as its end
+    has been read and the elements that are done with are dropped,
+    so the book is never held in memory as a whole.
+    Links are fixed in a final pass over the documents.
+    """
+    generated_ids = id_map
+    id_map = {}
+    binder = None
+    # The body, units and chapters being read, innermost last.
+    frames = []
+
+    def open_binder(frame):
+        """Make the frame's binder, once its heading has been read."""
+        if frame.binder is not None:
+            return
+        if frame.parent is None:
+            html_root = frame.elem.getroottree().getroot()
+            metadata = parse_metadata(
+                html_root.xpath('//*[@data-type="metadata"]')[0])
+            id_ = metadata['cnx-archive-uri'] or 'book'
+            frame.binder = Binder(id_, metadata=metadata)
+            frame.set_nav_tree(parse_navigation_html_to_tree(html_root, id_))
+            frame.top_metadata = metadata
+            return
+        parent = frame.parent.binder
+        top_metadata = frames[0].top_metadata
+        metadata, id_, shortid = _single_html_node_metadata(
+            parent, frame.elem, top_metadata)
+        frame.binder = _make_single_html_binder(
+            frame.elem, metadata, id_, shortid)
+        frame.set_nav_tree(_next_nav_node(frame.parent.nav_children))
+        # Making the binder takes its title out of the element,
+        # the remaining children are checked as they would be in a tree.
+        for child in frame.unchecked:
+            if child.getparent() is frame.elem:
+                check_data_type(child)
+        frame.unchecked = []
+
+    def check_data_type(elem):
+        if elem.attrib.get('data-type') not in ('metadata', None):
+            raise AdaptationError('Unknown data-type for child node')
+
+    for event, elem in etree.iterparse(file, events=('start', 'end',)):
+        if binder is not None:
+            continue
+        if not frames:
+            if event == 'start' and elem.tag == '{{{}}}body'.format(
+                    HTML_DOCUMENT_NAMESPACES['xhtml']):
+                frames.append(_SingleHTMLFrame(elem))
+            continue
+        frame = frames[-1]
+
+        if event == 'end' and elem is frame.elem:
+            # The end of the body, a unit or a chapter.
+            open_binder(frame)
+            _set_title_overrides(frame.binder, frame.title_overrides)
+            frames.pop()
+            if frames:
+                frames[-1].binder.append(frame.binder)
+                elem.getparent().remove(elem)
             else:
-                logger.error('Bad href: {}'.format(ref_val))
+                binder = frame.binder
+            continue
+        if elem.getparent() is not frame.elem:
+            continue
 
-        page.content = etree_to_content(content)
+        data_type = elem.attrib.get('data-type')
+        if event == 'start':
+            if data_type in _BINDER_DATA_TYPES + _PAGE_DATA_TYPES:
+                # Everything preceding the first unit, chapter or page,
+                # the metadata and title, has been read.
+                open_binder(frame)
+                if data_type in _BINDER_DATA_TYPES:
+                    frames.append(_SingleHTMLFrame(elem, frame))
+        elif data_type in _PAGE_DATA_TYPES:
+            metadata, id_, shortid = _single_html_node_metadata(
+                frame.binder, elem, frames[0].top_metadata)
+            _next_nav_node(frame.nav_children)
+            _add_single_html_page(frame.binder, elem, metadata, id_, id_map,
+                                  generated_ids)
+        elif data_type not in _BINDER_DATA_TYPES:
+            if frame.binder is None:
+                frame.unchecked.append(elem)
+            else:
+                check_data_type(elem)
 
-    def _compute_id(p, elem, key):
-        """Compute id and shortid from parent uuid and child attr"""
-        p_ids = [p.id.split('@')[0]]
-        if 'cnx-archive-uri' in p.metadata and p.metadata['cnx-archive-uri']:
-            p_ids.insert(0, p.metadata['cnx-archive-uri'].split('@')[0])
+    if binder is None:
+        raise AdaptationError('No body found')
+    for page in flatten_to_documents(binder):
+        _fix_links(page, id_map)
+    return binder
 
-        for p_id in p_ids:
-            try:
-                p_uuid = uuid.UUID(p_id)
-                break
-            except ValueError:
-                pass
-        else:  # Punt - no parent uuid, make one up for child
-            return str(uuid.uuid4())
-
-        uuid_key = elem.get('data-uuid-key', elem.get('class', key))
-        if (sys.version_info.major == 2):  # https://bugs.python.org/issue34145
-            uuid_key = uuid_key.encode('utf-8')
-        return str(uuid.uuid5(p_uuid, uuid_key))
-
-    def _compute_shortid(ident_hash):
-        """Compute shortId from uuid or ident_hash"""
-        ver = None
-        if '@' in ident_hash:
-            (id_str, ver) = ident_hash.split('@')
-        else:
-            id_str = ident_hash
-        try:
-            id_uuid = uuid.UUID(id_str)
-        except ValueError:
-            # id is not a uuid, no shortid
-            return None
 
-        shortid = (base64.urlsafe_b64encode(id_uuid.bytes)[:8]).decode('utf-8')
-        if ver:
-            return '@'.join((shortid, ver))
-        else:
-            return shortid
+class _SingleHTMLFrame(object):
+    """The state of a body, unit or chapter element being streamed."""
+
+    def __init__(self, elem, parent=None):
+        self.elem = elem
+        self.parent = parent
+        self.binder = None
+        self.title_overrides = None
+        self.nav_children = None
+        self.top_metadata = None
+        # Children read before the binder was made.
+        self.unchecked = []
+
+    def set_nav_tree(self, nav_tree):
+        self.title_overrides = [i.get('title') for i in nav_tree['contents']]
+        self.nav_children = iter(nav_tree['contents'])
+
+
+_BINDER_DATA_TYPES = ('unit', 'chapter', 'composite-chapter',)
+_PAGE_DATA_TYPES = ('page', 'composite-page',)
+
+
+def _adapt_single_html_tree(parent, elem, nav_tree, top_metadata,
+                            id_map=None, depth=0, generated_ids=None):
+    title_overrides = [i.get('title') for i in nav_tree['contents']]
+    nav_children = iter(nav_tree['contents'])
+
+    # A dictionary to allow look up of a document and new id using the old html
+    # element id
+
+    if id_map is None:
+        id_map = {}
 
     # Adapt each <div data-type="unit|chapter|page|composite-page"> into
     # translucent binders, documents and composite documents
     for child in elem.getchildren():
         data_type = child.attrib.get('data-type')
 
-        if data_type in ('unit', 'chapter', 'composite-chapter',
-                         'page', 'composite-page'):
-            try:
-                # metadata munging for all node types, in one place
-                metadata = parse_metadata(
-                        child.xpath('./*[@data-type="metadata"]')[0])
-            except ValueError:
-                logger.exception(
-                    'Error when parsing metadata for {} (id: {}, parent: "{}")'
-                    .format(data_type, child.attrib.get('id'),
-                            parent.metadata.get('title')))
-                raise
-            except IndexError:
-                logger.exception(
-                    'Metadata (data-type="metadata") not found:\n{}...'
-                    .format(etree.tostring(child).decode('utf-8')[:800]))
-                raise
-
-            # Handle version, id and uuid from metadata
-            if not metadata.get('version'):
-                if data_type.startswith('composite-'):
-                    if top_metadata.get('version') is not None:
-                        metadata['version'] = top_metadata['version']
-                elif parent.metadata.get('version') is not None:
-                    metadata['version'] = parent.metadata['version']
-
-            uuid_key = child.get('data-uuid-key')
-            child_id = child.attrib.get('id')
-            id_ = metadata.get('cnx-archive-uri') or (child_id
-                                                      if not uuid_key
-                                                      else None)
-            if not id_:
-                id_ = _compute_id(parent, child, metadata.get('title'))
-                if metadata.get('version'):
-                    metadata['cnx-archive-uri'] = \
-                        '@'.join((id_, metadata['version']))
-                else:
-                    metadata['cnx-archive-uri'] = id_
-                metadata['cnx-archive-shortid'] = None
-
-            if (metadata.get('cnx-archive-uri') and
-                    not metadata.get('cnx-archive-shortid')):
-                metadata['cnx-archive-shortid'] = \
-                        _compute_shortid(metadata['cnx-archive-uri'])
+        if data_type in _BINDER_DATA_TYPES + _PAGE_DATA_TYPES:
+            metadata, id_, shortid = _single_html_node_metadata(
+                parent, child, top_metadata)
 
-            shortid = metadata.get('cnx-archive-shortid')
-
-        if data_type in ['unit', 'chapter', 'composite-chapter']:
+        if data_type in _BINDER_DATA_TYPES:
             # All the non-leaf node types
-            title = lxml.html.HtmlElement(
-                        child.xpath('*[@data-type="document-title"]',
-                                    namespaces=HTML_DOCUMENT_NAMESPACES)[0]
-                        ).text_content().strip()
-            metadata.update({'title': title,
-                             'id': id_,
-                             'shortId': shortid,
-                             'type': data_type})
-            binder = Binder(id_, metadata=metadata)
+            binder = _make_single_html_binder(child, metadata, id_, shortid)
             # Recurse
             _adapt_single_html_tree(binder, child,
-                                    nav_tree['contents'].pop(0),
+                                    _next_nav_node(nav_children),
                                     top_metadata=top_metadata,
-                                    id_map=id_map, depth=depth+1)
+                                    id_map=id_map, depth=depth+1,
+                                    generated_ids=generated_ids)
             parent.append(binder)
-        elif data_type in ['page', 'composite-page']:
+        elif data_type in _PAGE_DATA_TYPES:
             # Leaf nodes
-            nav_tree['contents'].pop(0)
-            metadata_nodes = child.xpath("*[@data-type='metadata']",
-                                         namespaces=HTML_DOCUMENT_NAMESPACES)
-            for node in metadata_nodes:
-                child.remove(node)
-            for key in child.keys():
-                if key in ('itemtype', 'itemscope'):
-                    child.attrib.pop(key)
-
-            document_body = content_to_etree('')
-            document_body.append(child)
-            contents = etree.tostring(document_body)
-            model = {
-                'page': Document,
-                'composite-page': CompositeDocument,
-                }[child.attrib['data-type']]
-
-            document = model(id_, contents, metadata=metadata)
-            parent.append(document)
-
-            fix_generated_ids(document, id_map)  # also populates id_map
+            _next_nav_node(nav_children)
+            _add_single_html_page(parent, child, metadata, id_, id_map,
+                                  generated_ids)
         elif data_type in ['metadata', None]:
             # Expected non-nodal child types
             pass
         else:  # Fall through - child is not a defined type
             raise AdaptationError('Unknown data-type for child node')
 
+    _set_title_overrides(parent, title_overrides)
+
+    # only fixup links after all pages
+    # processed for whole book, to allow for foward links
+    if depth == 0:
+        for page in flatten_to_documents(parent):
+            _fix_links(page, id_map)
+
+
+def _adapt_single_html_tree_in_pool(parent, elem, nav_tree, top_metadata,
+                                    pool, generated_ids=None):
+    """Adapts the body as ``_adapt_single_html_tree`` does, but has each
+    unit and chapter adapted by a worker of ``pool``. The models and
+    id maps of the workers are merged in document order.
+    """
+    title_overrides = [i.get('title') for i in nav_tree['contents']]
+    nav_children = iter(nav_tree['contents'])
+    id_map = {}
+
+    # Pages, and the pending results of units and chapters, in order
+    nodes = []
+    for child in elem.getchildren():
+        data_type = child.attrib.get('data-type')
+
+        if data_type in _BINDER_DATA_TYPES + _PAGE_DATA_TYPES:
+            metadata, id_, shortid = _single_html_node_metadata(
+                parent, child, top_metadata)
+
+        if data_type in _BINDER_DATA_TYPES:
+            html, path = _single_html_chapter_context(child)
+            args = (html, path, metadata, id_, shortid,
+                    _next_nav_node(nav_children), top_metadata,
+                    generated_ids,)
+            nodes.append(pool.apply_async(_adapt_single_html_chapter, args))
+        elif data_type in _PAGE_DATA_TYPES:
+            _next_nav_node(nav_children)
+            nodes.append((child, metadata, id_,))
+        elif data_type in ['metadata', None]:
+            pass
+        else:
+            raise AdaptationError('Unknown data-type for child node')
+
+    for node in nodes:
+        if isinstance(node, tuple):
+            _add_single_html_page(parent, *node, id_map=id_map,
+                                  generated_ids=generated_ids)
+            continue
+        dumped_binder, chapter_id_map = node.get()
+        binder = _load_single_html_node(dumped_binder)
+        pages = list(flatten_to_documents(binder))
+        for key, (index, target) in chapter_id_map.items():
+            id_map[key] = (pages[index], target)
+        parent.append(binder)
+
+    _set_title_overrides(parent, title_overrides)
+
+    for page in flatten_to_documents(parent):
+        _fix_links(page, id_map)
+
+
+def _single_html_chapter_context(elem):
+    """Serializes a unit or chapter for a worker, within copies of its
+    ancestors and of their metadata, which the metadata of its pages
+    inherits from. Returns the html and the path of child positions
+    that leads to the unit or chapter.
+    """
+    path = []
+    copies = []
+    ancestors = list(elem.iterancestors())[::-1]
+    for ancestor, next_elem in zip(ancestors, ancestors[1:] + [elem]):
+        ancestor_copy = etree.Element(ancestor.tag, ancestor.attrib,
+                                      nsmap=ancestor.nsmap)
+        for child in ancestor:
+            if child is next_elem:
+                path.append(len(ancestor_copy))
+            elif child.get('data-type') in ('metadata', 'language',):
+                ancestor_copy.append(copy.deepcopy(child))
+        copies.append(ancestor_copy)
+    copies.append(copy.deepcopy(elem))
+    for parent, child, i in zip(copies, copies[1:], path):
+        parent.insert(i, child)
+    return etree.tostring(copies[0]), path
+
+
+def _adapt_single_html_chapter(html, path, metadata, id_, shortid, nav_tree,
+                               top_metadata, generated_ids=None):
+    """Adapts a unit or chapter in a worker process. The binder is
+    returned as plain data, along with its id map, in which pages are
+    given by their position in the binder.
+    """
+    child = etree.fromstring(html)
+    for i in path:
+        child = child[i]
+    binder = _make_single_html_binder(child, metadata, id_, shortid)
+    id_map = {}
+    _adapt_single_html_tree(binder, child, nav_tree,
+                            top_metadata=top_metadata,
+                            id_map=id_map, depth=1,
+                            generated_ids=generated_ids)
+    positions = dict((id(page), i,) for i, page
+                     in enumerate(flatten_to_documents(binder)))
+    id_map = dict((key, (positions[id(page)], target,))
+                  for key, (page, target) in id_map.items())
+    return _dump_single_html_node(binder), id_map
+
+
+def _dump_single_html_node(node):
+    if isinstance(node, TranslucentBinder):
+        return ('binder', node.id, node.metadata,
+                [_dump_single_html_node(n) for n in node],
+                [node.get_title_for_node(n) for n in node],)
+    data_type = isinstance(node, CompositeDocument) and 'composite' or 'page'
+    return (data_type, node.id, node.metadata, node.content,)
+
+
+def _load_single_html_node(data):
+    if data[0] == 'binder':
+        type_, id_, metadata, nodes, title_overrides = data
+        nodes = [_load_single_html_node(n) for n in nodes]
+        return Binder(id_, nodes, metadata, title_overrides)
+    type_, id_, metadata, content = data
+    model = type_ == 'composite' and CompositeDocument or Document
+    return model(id_, content, metadata=metadata)
+
+
+def _single_html_node_metadata(parent, child, top_metadata):
+    """Metadata, id and shortid of a unit, chapter or page element."""
+    data_type = child.attrib.get('data-type')
+    try:
+        # metadata munging for all node types, in one place
+        metadata = parse_metadata(
+                child.xpath('./*[@data-type="metadata"]')[0])
+    except ValueError:
+        logger.exception(
+            'Error when parsing metadata for {} (id: {}, parent: "{}")'
+            .format(data_type, child.attrib.get('id'),
+                    parent.metadata.get('title')))
+        raise
+    except IndexError:
+        logger.exception(
+            'Metadata (data-type="metadata") not found:\n{}...'
+            .format(etree.tostring(child).decode('utf-8')[:800]))
+        raise
+
+    # Handle version, id and uuid from metadata
+    if not metadata.get('version'):
+        if data_type.startswith('composite-'):
+            if top_metadata.get('version') is not None:
+                metadata['version'] = top_metadata['version']
+        elif parent.metadata.get('version') is not None:
+            metadata['version'] = parent.metadata['version']
+
+    uuid_key = child.get('data-uuid-key')
+    child_id = child.attrib.get('id')
+    id_ = metadata.get('cnx-archive-uri') or (child_id
+                                              if not uuid_key
+                                              else None)
+    if not id_:
+        id_ = _compute_id(parent, child, metadata.get('title'))
+        if metadata.get('version'):
+            metadata['cnx-archive-uri'] = \
+                '@'.join((id_, metadata['version']))
+        else:
+            metadata['cnx-archive-uri'] = id_
+        metadata['cnx-archive-shortid'] = None
+
+    if (metadata.get('cnx-archive-uri') and
+            not metadata.get('cnx-archive-shortid')):
+        metadata['cnx-archive-shortid'] = \
+                _compute_shortid(metadata['cnx-archive-uri'])
+
+    shortid = metadata.get('cnx-archive-shortid')
+    return metadata, id_, shortid
+
+
+def _make_single_html_binder(child, metadata, id_, shortid):
+    """Make the binder for a unit or chapter element,
+    without its contents."""
+    title = lxml.html.HtmlElement(
+                child.xpath('*[@data-type="document-title"]',
+                            namespaces=HTML_DOCUMENT_NAMESPACES)[0]
+                ).text_content().strip()
+    metadata.update({'title': title,
+                     'id': id_,
+                     'shortId': shortid,
+                     'type': child.attrib.get('data-type')})
+    return Binder(id_, metadata=metadata)
+
+
+def _add_single_html_page(parent, child, metadata, id_, id_map,
+                          generated_ids=None):
+    """Move the page element into a document added to ``parent``."""
+    metadata_nodes = child.xpath("*[@data-type='metadata']",
+                                 namespaces=HTML_DOCUMENT_NAMESPACES)
+    for node in metadata_nodes:
+        child.remove(node)
+    for key in child.keys():
+        if key in ('itemtype', 'itemscope'):
+            child.attrib.pop(key)
+
+    # The page is moved into the document as is.
+    document_body = content_to_etree('')
+    document_body.append(child)
+    model = {
+        'page': Document,
+        'composite-page': CompositeDocument,
+        }[child.attrib['data-type']]
+
+    document = model(id_, document_body, metadata=metadata)
+    parent.append(document)
+
+    # also populates id_map
+    _fix_generated_ids(document, id_map, generated_ids)
+    return document
+
+
+def _set_title_overrides(parent, title_overrides):
     # Assign title overrides
     if len(parent) != len(title_overrides):
         logger.error('Skipping title overrides -'
@@ -586,8 +1061,9 @@ def _adapt_single_html_tree(parent, elem, nav_tree, top_metadata,
     for i, node in enumerate(parent):
         parent.set_title_for_node(node, title_overrides[i])
 
-    # only fixup links after all pages
-    # processed for whole book, to allow for foward links
-    if depth == 0:
-        for page in flatten_to_documents(parent):
-            fix_links(page, id_map)
+
+def _next_nav_node(nav_children):
+    try:
+        return next(nav_children)
+    except StopIteration:
+        raise AdaptationError('Nav TOC does not match HTML structure')
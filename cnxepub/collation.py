@@ -20,7 +20,7 @@ except ImportError:
                   ImportWarning)
     raise
 
-from .adapters import adapt_single_html
+from .adapters import adapt_single_html, adapt_single_html_stream
 from .formatters import SingleHTMLFormatter
 
 
@@ -39,12 +39,24 @@ def easybake(ruleset, in_html, out_html):
     out_html.write(etree.tostring(html))
 
 
-def reconstitute(html):
-    """Given a file-like object as ``html``, reconstruct it into models."""
+def reconstitute(html, streaming=False, workers=1, id_map=None):
+    """Given a file-like object as ``html``, reconstruct it into models.
+    With ``streaming``, the html is read incrementally rather than
+    parsed as a whole, which keeps memory use down for large books.
+    Otherwise, ``workers`` is the number of processes that adapt
+    the book's units and chapters (see ``.adapters.adapt_single_html``).
+    The two are mutually exclusive.
+    ``id_map`` is the id map of the ``SingleHTMLFormatter`` that
+    made the html, if it is known.
+    """
+    if streaming and workers > 1:
+        raise ValueError("Cannot reconstitute with workers while streaming")
     html.seek(0)
+    if streaming:
+        return adapt_single_html_stream(html, id_map=id_map)
     htree = etree.parse(html)
     xhtml = etree.tostring(htree, encoding='utf-8')
-    return adapt_single_html(xhtml)
+    return adapt_single_html(xhtml, workers=workers, id_map=id_map)
 
 
 def collate(binder, ruleset=None, includes=None):
@@ -64,7 +76,8 @@ def collate(binder, ruleset=None, includes=None):
     easybake(ruleset, raw_html, collated_html)
 
     collated_html.seek(0)
-    collated_binder = reconstitute(collated_html)
+    collated_binder = reconstitute(collated_html,
+                                   id_map=html_formatter.id_map)
 
     return collated_binder
 
@@ -1,10 +1,15 @@
 # data_uri.py take from https://gist.github.com/zacharyvoase/5538178
 # This code is released under the Unlicense (c.f. http://unlicense.org/).
 
+import base64 as b64
+import io
 import mimetypes
 import re
-import urllib
 import textwrap
+try:
+    from urllib.parse import quote, unquote_to_bytes as unquote
+except ImportError:  # python 2
+    from urllib import quote, unquote
 
 
 MIMETYPE_REGEX = r'[\w]+\/[\w\-\+\.]+'
@@ -13,13 +18,17 @@ _MIMETYPE_RE = re.compile('^{}$'.format(MIMETYPE_REGEX))
 CHARSET_REGEX = r'[\w\-\+\.]+'
 _CHARSET_RE = re.compile('^{}$'.format(CHARSET_REGEX))
 
-DATA_URI_REGEX = (
+DATA_URI_HEADER_REGEX = (
     r'data:' +
     r'(?P<mimetype>{})?'.format(MIMETYPE_REGEX) +
     r'(?:\;charset\=(?P<charset>{}))?'.format(CHARSET_REGEX) +
-    r'(?P<base64>\;base64)?' +
-    r',(?P<data>.*)')
-_DATA_URI_RE = re.compile(r'^{}$'.format(DATA_URI_REGEX), re.DOTALL)
+    r'(?P<base64>\;base64)?')
+# The header is everything before the first comma
+_DATA_URI_HEADER_RE = re.compile(r'^{}$'.format(DATA_URI_HEADER_REGEX))
+
+# Characters of the payload decoded at a time
+CHUNK_SIZE = 64 * 1024
+_NOT_BASE64_RE = re.compile(r'[^A-Za-z0-9\+\/\=]')
 
 
 class DataURI(str):
@@ -37,22 +46,36 @@ class DataURI(str):
             parts.extend([';charset=', charset])
         if base64:
             parts.append(';base64')
-            encoded_data = data.encode('base64').replace('\n', '')
+            encoded_data = b64.b64encode(data)
+            if not isinstance(encoded_data, str):
+                encoded_data = encoded_data.decode('ascii')
         else:
-            encoded_data = urllib.quote(data)
+            encoded_data = quote(data)
         parts.extend([',', encoded_data])
         return cls(''.join(parts))
 
     @classmethod
     def from_file(cls, filename, charset=None, base64=True):
         mimetype, _ = mimetypes.guess_type(filename, strict=False)
-        with open(filename) as fp:
+        with open(filename, 'rb') as fp:
             data = fp.read()
         return cls.make(mimetype, charset, base64, data)
 
     def __new__(cls, *args, **kwargs):
+        if args and not isinstance(args[0], str) and \
+                isinstance(args[0], bytes):
+            args = (args[0].decode('utf-8'),) + args[1:]
         uri = super(DataURI, cls).__new__(cls, *args, **kwargs)
-        uri._parse  # Trigger any ValueErrors on instantiation.
+        # Parse the header once, which triggers any ValueErrors
+        # on instantiation. The payload is only decoded when asked for.
+        comma = uri.find(',')
+        match = comma >= 0 and _DATA_URI_HEADER_RE.match(uri[:comma])
+        if not match:
+            raise ValueError("Not a valid data URI: %r" % uri)
+        uri._header = (match.group('mimetype') or None,
+                       match.group('charset') or None,
+                       bool(match.group('base64')),
+                       comma + 1,)
         return uri
 
     def __repr__(self):
@@ -63,29 +86,50 @@ class DataURI(str):
 
     @property
     def mimetype(self):
-        return self._parse[0]
+        return self._header[0]
 
     @property
     def charset(self):
-        return self._parse[1]
+        return self._header[1]
 
     @property
     def is_base64(self):
-        return self._parse[2]
+        return self._header[2]
 
     @property
     def data(self):
-        return self._parse[3]
-
-    @property
-    def _parse(self):
-        match = _DATA_URI_RE.match(self)
-        if not match:
-            raise ValueError("Not a valid data URI: %r" % self)
-        mimetype = match.group('mimetype') or None
-        charset = match.group('charset') or None
-        if match.group('base64'):
-            data = match.group('data').decode('base64')
-        else:
-            data = urllib.unquote(match.group('data'))
-        return mimetype, charset, bool(match.group('base64')), data
+        return self.open().getvalue()
+
+    def open(self):
+        """Returns the decoded data as a ``BytesIO``."""
+        data = io.BytesIO()
+        self.write_data(data)
+        data.seek(0)
+        return data
+
+    def write_data(self, file):
+        """Decodes the data into ``file``, a binary file-like object,
+        a chunk at a time.
+        """
+        start = self._header[3]
+        # Undecoded characters at the end of the previous chunk
+        pending = ''
+        for i in range(start, len(self), CHUNK_SIZE):
+            chunk = pending + self[i:i + CHUNK_SIZE]
+            if self.is_base64:
+                chunk = _NOT_BASE64_RE.sub('', chunk)
+                end = len(chunk) - len(chunk) % 4
+                file.write(b64.b64decode(chunk[:end]))
+            else:
+                # Keep back an escape that is cut off by the chunk
+                end = chunk.find('%', max(len(chunk) - 2, 0))
+                if end < 0:
+                    end = len(chunk)
+                file.write(unquote(chunk[:end]))
+            pending = chunk[end:]
+        if pending:
+            if self.is_base64:
+                # Let the decoder complain about the incomplete input
+                file.write(b64.b64decode(pending))
+            else:
+                file.write(unquote(pending))
@@ -7,13 +7,25 @@
 # ###
 import os
 import io
+import collections
+import functools
+import mimetypes
+import posixpath
+import shutil
+import sys
 import tempfile
+import time
 import zipfile
-from collections import Sequence
+from multiprocessing.pool import ThreadPool
+try:
+    from collections.abc import Sequence, MutableSequence
+except ImportError:
+    from collections import Sequence, MutableSequence
 
-import jinja2
 from lxml import etree
 
+from .templates import register_template, get_template
+
 
 __all__ = ('EPUB', 'Package', 'Item',)
 
@@ -75,6 +87,15 @@ OPF_TEMPLATE = """\
   </manifest>
 </package>
 """
+# Media types of data that is already compressed,
+# which is stored in the archive as-is rather than deflated again.
+COMPRESSED_MEDIA_TYPES = (
+    EPUB_MIMETYPE_CONTENTS,
+    'application/gzip', 'application/x-gzip', 'application/zip',
+    'font/woff', 'font/woff2', 'application/font-woff',
+    'image/gif', 'image/jpeg', 'image/png', 'image/webp',
+    )
+COMPRESSED_MEDIA_TYPE_PREFIXES = ('audio/', 'video/',)
 CONTAINER_XML_TEMPLATE = """\
 <?xml version="1.0" encoding="UTF-8"?>
 <container xmlns="urn:oasis:names:tc:opendocument:xmlns:container"
@@ -90,6 +111,10 @@ CONTAINER_XML_TEMPLATE = """\
 """
 
 
+register_template('epub/package.opf', OPF_TEMPLATE)
+register_template('epub/container.xml', CONTAINER_XML_TEMPLATE)
+
+
 class MissingNavigationError(Exception):
     """Raised when a ``Package`` is missing a navigation document.
     http://www.idpf.org/epub/30/spec/epub30-overview.html#sec-nav
@@ -100,24 +125,119 @@ class AdditionalNavigationError(Exception):
     """Raised when a ``Package`` has more then one navigation document."""
 
 
+class DuplicateItemError(Exception):
+    """Raised when a ``Package`` is given more than one item
+    with the same name.
+    """
+
+
 class MissingMetadataError(Exception):
     """Raised when a piece of required metadata is missing from the document.
     """
 
 
-def pack_epub(directory, file):
+def compression_for(media_type):
+    """Choose the zip compression method for data of the given
+    ``media_type``. Already compressed media is stored,
+    everything else is deflated.
+    """
+    if media_type is not None and (
+            media_type in COMPRESSED_MEDIA_TYPES or
+            media_type.startswith(COMPRESSED_MEDIA_TYPE_PREFIXES)):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _read_data(member):
+    """Read the data of an archive member given as
+    ``(arcname, media_type, read)``,
+    where ``read`` is a callable producing the member's data.
+    """
+    arcname, media_type, read = member
+    return arcname, media_type, read()
+
+
+def write_members(archive, members, compresslevel=None, workers=1):
+    """Write the ``members`` into ``archive`` (a ``zipfile.ZipFile``
+    open for writing). Each member is given as
+    ``(arcname, media_type, read)``, where ``read`` is a callable
+    producing the member's data.
+
+    The members are compressed according to their media-type
+    (see ``compression_for``) at the given ``compresslevel``,
+    which ``zipfile`` only supports from Python 3.7 on.
+    When ``workers`` is more than one, members are read in a pool
+    of threads, while still being written in the given order.
+    Only a few members per worker are read ahead of the writer,
+    so that their data doesn't pile up in memory.
+    """
+    if workers > 1:
+        window = 2 * workers
+        pending = collections.deque()
+        pool = ThreadPool(workers)
+        try:
+            for member in members:
+                if len(pending) >= window:
+                    _write_member(archive, *pending.popleft().get(),
+                                  compresslevel=compresslevel)
+                pending.append(pool.apply_async(_read_data, (member,)))
+            while pending:
+                _write_member(archive, *pending.popleft().get(),
+                              compresslevel=compresslevel)
+        finally:
+            pool.terminate()
+    else:
+        for member in members:
+            _write_member(archive, *_read_data(member),
+                          compresslevel=compresslevel)
+
+
+def _write_member(archive, arcname, media_type, data, compresslevel=None):
+    """Write the data of a member into the archive,
+    compressed according to its media-type.
+    """
+    zinfo = zipfile.ZipInfo(arcname, time.localtime(time.time())[:6])
+    zinfo.external_attr = 0o600 << 16  # ?rw-------
+    zinfo.compress_type = compression_for(media_type)
+    if compresslevel is None or sys.version_info < (3, 7):
+        archive.writestr(zinfo, data)
+    else:
+        archive.writestr(zinfo, data, compresslevel=compresslevel)
+
+
+def _read_path(filepath):
+    with open(filepath, 'rb') as fb:
+        return fb.read()
+
+
+def pack_epub(directory, file, compresslevel=None, workers=1):
     """Pack the given ``directory`` into an epub (i.e. zip) archive
     given as ``file``, which can be a file-path or file-like object.
+    See ``write_members`` for the ``compresslevel``
+    and ``workers`` arguments.
     """
+    base_path = os.path.abspath(directory)
+    # The mimetype must be the first entry and left uncompressed.
+    members = []
+    mimetype_filepath = os.path.join(base_path, EPUB_MIMETYPE_RELATIVE_PATH)
+    if os.path.isfile(mimetype_filepath):
+        members.append((EPUB_MIMETYPE_RELATIVE_PATH, EPUB_MIMETYPE_CONTENTS,
+                        functools.partial(_read_path, mimetype_filepath),))
+    for root, dirs, filenames in os.walk(directory):
+        # Strip the absolute path
+        archive_path = os.path.relpath(root, base_path)
+        for filename in filenames:
+            filepath = os.path.join(root, filename)
+            archival_filepath = os.path.normpath(
+                os.path.join(archive_path, filename))
+            if archival_filepath == EPUB_MIMETYPE_RELATIVE_PATH:
+                continue
+            media_type, _ = mimetypes.guess_type(filename, strict=False)
+            members.append((archival_filepath.replace(os.sep, '/'),
+                            media_type,
+                            functools.partial(_read_path, filepath),))
     with zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED) as zippy:
-        base_path = os.path.abspath(directory)
-        for root, dirs, filenames in os.walk(directory):
-            # Strip the absolute path
-            archive_path = os.path.relpath(root, base_path)
-            for filename in filenames:
-                filepath = os.path.join(root, filename)
-                archival_filepath = os.path.join(archive_path, filename)
-                zippy.write(filepath, archival_filepath)
+        write_members(zippy, members, compresslevel, workers)
 
 
 def unpack_epub(file, directory):
@@ -133,33 +253,50 @@ def unpack_epub(file, directory):
 class EPUB(Sequence):
     """Represents an EPUB3 file structure in object form.
     It is designed to work with .epub files (zip files),
-    but will uncompress them to a temporary location before working with them.
+    but will uncompress them to a temporary location before working with them,
+    unless asked to read them in place (see ``from_file``).
+
+    Instances can be used as a context manager, which releases
+    the open archive and any temporarily extracted files on exit.
 
     """
 
-    def __init__(self, packages=None, root=None):
+    def __init__(self, packages=None, root=None, archive=None):
         self._packages = packages is None and [] or packages
         self._root = root
+        self._archive = archive
+        self._is_temporary_root = False
 
     @classmethod
-    def from_file(cls, file):
+    def from_file(cls, file, extract=True, eager=False, workers=1):
         """Create the object from a *file* or *file-like object*.
         The file can point to an ``.epub`` file or a directory
         (the contents of which reflect
         the internal struture of an ``.epub`` archive).
         If given an non-archive file,
         this structure will be used when reading in and parsing the epub.
-        If an archive file is given,
+        If an archive file is given and ``extract`` is true,
         it will be extracted to the temporal filesystem.
+        Otherwise the archive is read in place, with each item's data
+        coming straight from the archive.
+        Item data is read on demand, unless ``eager`` is set.
+        When ``workers`` is more than one, the packages are parsed
+        in a pool of threads. They are kept in container order regardless.
         """
         root = None
+        archive = None
+        is_temporary_root = False
         if zipfile.is_zipfile(file):
-            unpack_dir = tempfile.mkdtemp('-epub')
-            # Extract the epub to the current working directory.
-            with zipfile.ZipFile(file, 'r') as zf:
-                zf.extractall(path=unpack_dir)
-            root = unpack_dir
-        elif os.path.isdir(file):
+            if extract:
+                unpack_dir = tempfile.mkdtemp('-epub')
+                # Extract the epub to the current working directory.
+                with zipfile.ZipFile(file, 'r') as zf:
+                    zf.extractall(path=unpack_dir)
+                root = unpack_dir
+                is_temporary_root = True
+            else:
+                archive = zipfile.ZipFile(file, 'r')
+        elif not hasattr(file, 'read') and os.path.isdir(file):
             root = file
         else:
             raise TypeError("Can't decipher what should be done "
@@ -169,44 +306,84 @@ class EPUB(Sequence):
         #      to anything done here.
 
         # Build a blank epub object then parse the packages.
-        container_xml_filepath = os.path.join(root,
-                                              EPUB_CONTAINER_XML_RELATIVE_PATH)
-        container_xml = etree.parse(container_xml_filepath)
+        try:
+            if archive is not None:
+                with archive.open(EPUB_CONTAINER_XML_RELATIVE_PATH) as fb:
+                    container_xml = etree.parse(fb)
+            else:
+                container_xml = etree.parse(
+                    os.path.join(root, EPUB_CONTAINER_XML_RELATIVE_PATH))
 
-        packages = []
-        for pkg_filepath in container_xml.xpath(
+            pkg_filepaths = container_xml.xpath(
                 '//ns:rootfile/@full-path',
-                namespaces=EPUB_CONTAINER_XML_NAMESPACES):
-            filepath = os.path.join(root, pkg_filepath)
-            packages.append(Package.from_file(filepath))
-        return cls(packages=packages, root=root)
+                namespaces=EPUB_CONTAINER_XML_NAMESPACES)
+
+            def parse_package(pkg_filepath):
+                if archive is not None:
+                    return Package.from_zipfile(archive, pkg_filepath,
+                                                eager=eager)
+                filepath = os.path.join(root, pkg_filepath)
+                return Package.from_file(filepath, eager=eager)
+
+            if workers > 1 and len(pkg_filepaths) > 1:
+                pool = ThreadPool(min(workers, len(pkg_filepaths)))
+                try:
+                    packages = pool.map(parse_package, pkg_filepaths)
+                finally:
+                    pool.terminate()
+            else:
+                packages = [parse_package(x) for x in pkg_filepaths]
+        except Exception:
+            if archive is not None:
+                archive.close()
+            raise
+        epub = cls(packages=packages, root=root, archive=archive)
+        epub._is_temporary_root = is_temporary_root
+        return epub
+
+    def close(self):
+        """Release the archive this object reads from
+        and remove any files that were extracted on its behalf.
+        """
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+        if self._is_temporary_root and self._root is not None:
+            shutil.rmtree(self._root, ignore_errors=True)
+            self._is_temporary_root = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     @staticmethod
-    def to_file(epub, file):
-        """Export to ``file``, which is a *file* or *file-like object*."""
-        directory = tempfile.mkdtemp('-epub')
-        # Write out the contents to the filesystem.
-        package_filenames = []
-        for package in epub:
-            opf_filepath = Package.to_file(package, directory)
-            opf_filename = os.path.basename(opf_filepath)
-            package_filenames.append(opf_filename)
-
-        # Create the container.xml
-        container_xml_filepath = os.path.join(directory,
-                                              EPUB_CONTAINER_XML_RELATIVE_PATH)
-        template = jinja2.Template(CONTAINER_XML_TEMPLATE,
-                                   trim_blocks=True, lstrip_blocks=True)
-        os.makedirs(os.path.dirname(container_xml_filepath))  # FIXME PY3
-        with open(container_xml_filepath, 'w') as fb:
+    def to_file(epub, file, compresslevel=None, workers=1):
+        """Export to ``file``, which is a *file* or *file-like object*.
+        The contents are streamed directly into the archive.
+        See ``write_members`` for the ``compresslevel``
+        and ``workers`` arguments.
+        """
+        with zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED) as zippy:
+            # The mimetype must be the first entry and left uncompressed.
+            write_members(zippy, [(EPUB_MIMETYPE_RELATIVE_PATH,
+                                   EPUB_MIMETYPE_CONTENTS,
+                                   lambda: EPUB_MIMETYPE_CONTENTS.encode(
+                                       'utf-8'),)])
+
+            package_filenames = []
+            for package in epub:
+                package_filenames.append(Package.to_zipfile(
+                    package, zippy, compresslevel, workers))
+
+            # Create the container.xml
+            template = get_template('epub/container.xml')
             xml = template.render(package_filenames=package_filenames)
-            fb.write(xml)
-        # Write the mimetype file.
-        with open(os.path.join(directory, 'mimetype'), 'w') as fb:
-            fb.write("application/epub+zip")
-
-        # Pack everything up
-        pack_epub(directory, file=file)
+            write_members(zippy, [(EPUB_CONTAINER_XML_RELATIVE_PATH,
+                                   'application/xml',
+                                   lambda: xml.encode('utf-8'),)],
+                          compresslevel)
 
     # ABC methods for MutableSequence
     def __getitem__(self, k):
@@ -326,8 +503,28 @@ class OPFParser:
         return items
 
 
-class Package(Sequence):
-    """EPUB3 package"""
+def _parse_manifest(opf_xml):
+    """Roll through the manifest item entries of the given ``opf_xml``,
+    yielding the item's href and the keyword arguments for ``Item``.
+    """
+    manifest = opf_xml.xpath('/opf:package/opf:manifest/opf:item',
+                             namespaces=EPUB_OPF_NAMESPACES)
+    for item in manifest:
+        properties = item.get('properties', '').split()
+        yield item.get('href'), {
+            'href': item.get('href'),
+            'media_type': item.get('media-type'),
+            'is_navigation': 'nav' in properties,
+            'properties': properties,
+            }
+
+
+class Package(MutableSequence):
+    """EPUB3 package
+
+    The items are indexed by name, href and media-type.
+    The indexes are kept up to date as items are added or removed.
+    """
 
     def __init__(self, name, items, metadata=None):
         self.name = name
@@ -342,12 +539,37 @@ class Package(Sequence):
                 "per package. The given value is a second "
                 "navigation item.")
         else:
-            index = self._items.index(navigation_items[0])
-            self._navigation_item_index = index
+            self._navigation_item = navigation_items[0]
+
+        self._items_by_name = {}
+        self._items_by_href = {}
+        self._items_by_media_type = {}
+        for item in self._items:
+            self._index_item(item)
+
+    def _index_item(self, item):
+        if item.name in self._items_by_name:
+            raise DuplicateItemError(
+                "'{}' is already in the package.".format(item.name))
+        self._items_by_name[item.name] = item
+        if item.href is not None:
+            self._items_by_href[posixpath.normpath(item.href)] = item
+        self._items_by_media_type.setdefault(item.media_type, []) \
+            .append(item)
+
+    def _unindex_item(self, item):
+        del self._items_by_name[item.name]
+        if item.href is not None:
+            self._items_by_href.pop(posixpath.normpath(item.href), None)
+        self._items_by_media_type[item.media_type].remove(item)
+        if item is self._navigation_item:
+            self._navigation_item = None
 
     @classmethod
-    def from_file(cls, file):
-        """Create the object from a *file* or *file-like object*."""
+    def from_file(cls, file, eager=False):
+        """Create the object from a *file* or *file-like object*.
+        Item data is read on demand, unless ``eager`` is set.
+        """
         opf_xml = etree.parse(file)
         # Check if ``file`` is file-like.
         if hasattr(file, 'read'):
@@ -359,22 +581,35 @@ class Package(Sequence):
         parser = OPFParser(opf_xml)
 
         # Roll through the item entries
-        manifest = opf_xml.xpath('/opf:package/opf:manifest/opf:item',
-                                 namespaces=EPUB_OPF_NAMESPACES)
         pkg_items = []
-        for item in manifest:
-            absolute_filepath = os.path.join(root, item.get('href'))
-            properties = item.get('properties', '').split()
-            is_navigation = 'nav' in properties
-            media_type = item.get('media-type')
-            pkg_items.append(Item.from_file(absolute_filepath,
-                                            media_type=media_type,
-                                            is_navigation=is_navigation,
-                                            properties=properties))
+        for href, kwargs in _parse_manifest(opf_xml):
+            absolute_filepath = os.path.join(root, href)
+            pkg_items.append(Item.from_file(absolute_filepath, eager=eager,
+                                            **kwargs))
         # Ignore spine ordering, because it is not important
         #   for our use cases.
         return cls(name, pkg_items, parser.metadata)
 
+    @classmethod
+    def from_zipfile(cls, archive, filepath, eager=False):
+        """Create the object from the ``filepath`` member of ``archive``
+        (an open ``zipfile.ZipFile``). The items are read from
+        the archive rather than from the filesystem,
+        on demand unless ``eager`` is set.
+        """
+        with archive.open(filepath) as fb:
+            opf_xml = etree.parse(fb)
+        name = posixpath.basename(filepath)
+        root = posixpath.dirname(filepath)
+        parser = OPFParser(opf_xml)
+
+        pkg_items = []
+        for href, kwargs in _parse_manifest(opf_xml):
+            member = posixpath.normpath(posixpath.join(root, href))
+            pkg_items.append(Item.from_zipfile(archive, member, eager=eager,
+                                               **kwargs))
+        return cls(name, pkg_items, parser.metadata)
+
     @staticmethod
     def to_file(package, directory):
         """Write the package to the given ``directory``.
@@ -391,59 +626,229 @@ class Package(Sequence):
         # Write the items to the filesystem
         locations = {}  # Used when rendering
         for item in package:
-            if item.media_type == 'application/xhtml+xml':
-                base = os.path.join(directory, 'contents')
-            else:
-                base = os.path.join(directory, 'resources')
-            filename = item.name
-            filepath = os.path.join(base, filename)
-            locations[item] = os.path.relpath(filepath, directory)
+            locations[item] = _item_location(item)
+            filepath = os.path.join(directory, *locations[item].split('/'))
             with open(filepath, 'wb') as item_file:
                 item_file.write(item.data.read())
 
         # Write the OPF
-        template = jinja2.Template(OPF_TEMPLATE,
-                                   trim_blocks=True, lstrip_blocks=True)
         with open(opf_filepath, 'wb') as opf_file:
-            opf = template.render(package=package, locations=locations)
-            if not isinstance(opf, bytes):
-                opf = opf.encode('utf-8')
-            opf_file.write(opf)
+            opf_file.write(_render_opf(package, locations))
 
         return opf_filepath
 
+    @staticmethod
+    def to_zipfile(package, archive, compresslevel=None, workers=1):
+        """Write the package into ``archive`` (a ``zipfile.ZipFile``
+        open for writing), one item at a time.
+        See ``write_members`` for the ``compresslevel``
+        and ``workers`` arguments.
+        Returns the OPF's path within the archive.
+        """
+        locations = {}  # Used when rendering
+        members = []
+        for item in package:
+            locations[item] = _item_location(item)
+            members.append((locations[item], item.media_type,
+                            functools.partial(_read_item, item),))
+        opf = _render_opf(package, locations)
+        members.append((package.name, 'application/oebps-package+xml',
+                        lambda: opf,))
+
+        write_members(archive, members, compresslevel, workers)
+        return package.name
+
     @property
     def navigation(self):
-        return self._items[self._navigation_item_index]
+        if self._navigation_item is None:
+            raise MissingNavigationError("Navigation item not found")
+        return self._navigation_item
 
     def grab_by_name(self, name):
         try:
-            return [i for i in self._items if i.name == name][0]
-        except IndexError:
+            return self._items_by_name[name]
+        except KeyError:
             raise KeyError("'{}' not found in package.".format(name))
 
-    # ABC methods for Sequence
+    def grab_by_href(self, href):
+        """Grab the item by its href, as given in the package's manifest."""
+        try:
+            return self._items_by_href[posixpath.normpath(href)]
+        except KeyError:
+            raise KeyError("'{}' not found in package.".format(href))
+
+    def grab_by_media_type(self, media_type):
+        """Grab the items of the given ``media_type``,
+        in the order they were added to the package.
+        """
+        return list(self._items_by_media_type.get(media_type, []))
+
+    def _check_navigation(self, item, replacing=None):
+        if item.is_navigation and self._navigation_item is not None \
+           and self._navigation_item is not replacing:
+            raise AdditionalNavigationError(
+                "Only one navigation item can exist "
+                "per package. The given value is a second "
+                "navigation item.")
+
+    # ABC methods for MutableSequence
     def __getitem__(self, k):
         return self._items[k]
 
+    def __setitem__(self, k, item):
+        if isinstance(k, slice):
+            item = items = list(item)
+            old_items = self._items[k]
+        else:
+            items, old_items = [item], [self._items[k]]
+        navigation_items = [i for i in items if i.is_navigation]
+        if len(navigation_items) > 1:
+            raise AdditionalNavigationError(
+                "Only one navigation item can exist per package.")
+        replacing = None
+        if any(i is self._navigation_item for i in old_items):
+            replacing = self._navigation_item
+        for navigation_item in navigation_items:
+            self._check_navigation(navigation_item, replacing=replacing)
+        old_navigation_item = self._navigation_item
+        for old_item in old_items:
+            self._unindex_item(old_item)
+        indexed_items = []
+        try:
+            for new_item in items:
+                self._index_item(new_item)
+                indexed_items.append(new_item)
+            self._items[k] = item
+        except Exception:
+            # Put the indexes back the way they were.
+            for new_item in indexed_items:
+                self._unindex_item(new_item)
+            for old_item in old_items:
+                self._index_item(old_item)
+            self._navigation_item = old_navigation_item
+            raise
+        for navigation_item in navigation_items:
+            self._navigation_item = navigation_item
+
+    def __delitem__(self, k):
+        old_items = self._items[k]
+        if not isinstance(k, slice):
+            old_items = [old_items]
+        del self._items[k]
+        for old_item in old_items:
+            self._unindex_item(old_item)
+
     def __len__(self):
         return len(self._items)
 
+    def insert(self, k, item):
+        self._check_navigation(item)
+        self._index_item(item)
+        self._items.insert(k, item)
+        if item.is_navigation:
+            self._navigation_item = item
+
+
+def _item_location(item):
+    """Location of the ``item`` relative to the package's OPF file."""
+    if item.media_type == 'application/xhtml+xml':
+        base = 'contents'
+    else:
+        base = 'resources'
+    return posixpath.join(base, item.name)
+
 
-class Item:
-    """Package item"""
+def _read_item(item):
+    """Read all of the item's data, from the start. Data loaded
+    for this is released again once read (see ``Item.release``).
+    """
+    data = item.data
+    data.seek(0)
+    content = data.read()
+    data.seek(0)
+    item.release()
+    return content
+
+
+def _render_opf(package, locations):
+    template = get_template('epub/package.opf')
+    opf = template.render(package=package, locations=locations)
+    if not isinstance(opf, bytes):
+        opf = opf.encode('utf-8')
+    return opf
+
+
+def _read_file(filepath):
+    with open(filepath, 'rb') as fb:
+        return io.BytesIO(fb.read())
+
+
+def _read_member(archive, member):
+    return io.BytesIO(archive.read(member))
+
+
+class Item(object):
+    """Package item
+
+    The item's ``data`` is either given up front or,
+    when an ``opener`` callable is given, loaded on first access.
+    Loaded data can be dropped using ``release`` and will be
+    loaded again when next accessed.
+    """
 
     def __init__(self, name, data=None, media_type=None,
-                 is_navigation=False, properties=None, **kwargs):
+                 is_navigation=False, properties=None, opener=None,
+                 href=None, **kwargs):
         self.name = name
-        self.data = data
+        # The location given by the package manifest, when read from one.
+        self.href = href
+        self._data = data
+        self._opener = opener
         self.media_type = media_type
         self.is_navigation = bool(is_navigation)
         self.properties = properties or []
 
+    def _data__get(self):
+        if self._data is None and self._opener is not None:
+            self._data = self._opener()
+        return self._data
+
+    def _data__set(self, value):
+        # Explicitly assigned data can't be reloaded.
+        self._data = value
+        self._opener = None
+
+    data = property(_data__get, _data__set)
+
+    @property
+    def is_loaded(self):
+        return self._data is not None
+
+    def release(self):
+        """Drop the loaded data, if it can be loaded again on demand."""
+        if self._opener is not None:
+            self._data = None
+
     @classmethod
-    def from_file(cls, filepath, **kwargs):
+    def from_file(cls, filepath, eager=False, **kwargs):
+        """Create the item from the file at ``filepath``.
+        The file is read on first access of ``data``,
+        unless ``eager`` is set.
+        """
         name = os.path.basename(filepath)
-        with open(filepath, 'rb') as fb:
-            data = io.BytesIO(fb.read())
-        return cls(name, data, **kwargs)
+        opener = functools.partial(_read_file, filepath)
+        if eager:
+            return cls(name, opener(), **kwargs)
+        return cls(name, opener=opener, **kwargs)
+
+    @classmethod
+    def from_zipfile(cls, archive, member, eager=False, **kwargs):
+        """Create the item from the ``member`` of ``archive``
+        (an open ``zipfile.ZipFile``). The member is read
+        on first access of ``data``, unless ``eager`` is set.
+        """
+        name = posixpath.basename(member)
+        opener = functools.partial(_read_member, archive, member)
+        if eager:
+            return cls(name, opener(), **kwargs)
+        return cls(name, opener=opener, **kwargs)
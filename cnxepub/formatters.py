@@ -13,7 +13,6 @@ import sys
 from io import BytesIO
 
 import re
-import jinja2
 import lxml.html
 from lxml import etree
 from copy import deepcopy
@@ -27,6 +26,7 @@ from .models import (
     Document, DocumentPointer, CompositeDocument, utf8)
 from .html_parsers import HTML_DOCUMENT_NAMESPACES
 from .utils import ThreadPoolExecutor
+from .templates import register_template, get_template
 from .templates.exercise_template import EXERCISE_TEMPLATE
 
 logger = logging.getLogger('cnxepub')
@@ -96,6 +96,8 @@ class HTMLFormatter(object):
         self.model = model
         self.extensions = extensions
         self.generate_ids = generate_ids
+        # Generated ids, mapped to the original ids
+        self.generated_ids = {}
 
     def _generate_ids(self, document, content):
         """Generate unique ids for html elements in page content so that it's
@@ -113,6 +115,7 @@ class HTMLFormatter(object):
             new_id = 'auto_{}_{}'.format(document_id, old_id)
             node.attrib['id'] = new_id
             old_id_to_new_id[old_id] = new_id
+            self.generated_ids[new_id] = old_id
             existing_ids.append(new_id)
 
         # Step 2: redirect links to elements with now prefixed ids
@@ -140,15 +143,8 @@ class HTMLFormatter(object):
     @property
     def _template(self):
         if isinstance(self.model, DocumentPointer):
-            return jinja2.Template(DOCUMENT_POINTER_TEMPLATE,
-                                   trim_blocks=True, lstrip_blocks=True)
-
-        def isdict(v):
-            return isinstance(v, dict)
-
-        template_env = jinja2.Environment(trim_blocks=True, lstrip_blocks=True)
-        return template_env.from_string(HTML_DOCUMENT,
-                                        globals={'isdict': isdict})
+            return get_template('html/document-pointer.xhtml')
+        return get_template('html/document.xhtml')
 
     @property
     def _template_args(self):
@@ -190,6 +186,9 @@ class SingleHTMLFormatter(object):
         self.includes = includes
         self.included = False
         self.threads = threads
+        # Ids generated for the elements of pages, mapped to
+        # the ident-hash of the page and the original id
+        self.id_map = {}
 
     def xpath(self, path, elem=None):
         if elem is None:
@@ -242,7 +241,10 @@ class SingleHTMLFormatter(object):
                       ).text = node.metadata['title']
                 self._build_binder(node, child_elem)
             elif isinstance(node, (Document, DocumentPointer)):
-                html = bytes(HTMLFormatter(node, generate_ids=True))
+                formatter = HTMLFormatter(node, generate_ids=True)
+                html = bytes(formatter)
+                for new_id, old_id in formatter.generated_ids.items():
+                    self.id_map[new_id] = (node.ident_hash, old_id,)
                 doc_root = etree.fromstring(html)
                 body = doc_root.xpath('//xhtml:body',
                                       namespaces=HTML_DOCUMENT_NAMESPACES)[0]
@@ -284,6 +286,14 @@ class SingleHTMLFormatter(object):
                             page_uuids[link_uuid]))
         self.built = True
 
+    def write_id_map(self, file):
+        """Write the id map as JSON to ``file``, a text file,
+        to be given to ``.adapters.adapt_single_html`` with the html.
+        """
+        if not self.built:
+            self.build()
+        json.dump(self.id_map, file, sort_keys=True, separators=(',', ':'))
+
     def __unicode__(self):
         return self.__bytes__().decode('utf-8')
 
@@ -892,6 +902,9 @@ HTML_DOCUMENT = """\
 </html>
 """
 
+register_template('html/document-pointer.xhtml', DOCUMENT_POINTER_TEMPLATE)
+register_template('html/document.xhtml', HTML_DOCUMENT)
+
 
 # YANK This was pulled from cnx-archive to temporarily provide
 #      a way to render the the tree to html. This either needs to
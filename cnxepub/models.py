@@ -5,6 +5,7 @@
 # Public License version 3 (AGPLv3).
 # See LICENCE.txt for details.
 # ###
+import copy
 import io
 import hashlib
 import mimetypes
@@ -201,23 +202,26 @@ def _discover_uri_type(uri):
     return type_
 
 
-def _parse_references(xml):
+def _parse_references(xml, document=None):
     """Parse the references to ``Reference`` instances."""
     references = []
     ref_finder = HTMLReferenceFinder(xml)
     for elm, uri_attr in ref_finder:
         type_ = _discover_uri_type(elm.get(uri_attr))
-        references.append(Reference(elm, type_, uri_attr))
+        references.append(Reference(elm, type_, uri_attr, document))
     return references
 
 
 class Reference(object):
     """A reference within a ``Document`` model, either internal or external.
     This depends on an xml element tree, to provide binds for uri and name.
+    The ``document`` the element belongs to, when given, is notified
+    of changes made to the uri.
     """
 
-    def __init__(self, elm, remote_type, uri_attr):
+    def __init__(self, elm, remote_type, uri_attr, document=None):
         self.elm = elm
+        self.document = document
         try:
             assert remote_type in REFERENCE_REMOTE_TYPES
         except AssertionError:
@@ -246,7 +250,7 @@ class Reference(object):
     def _set_uri(self, value):
         if self.is_bound:
             raise ValueError("URI is bound to an object. Unbind first.")
-        self.elm.set(self._uri_attr, value)
+        self._set_attr(value)
 
     uri = property(_get_uri, _set_uri)
 
@@ -258,7 +262,14 @@ class Reference(object):
     def _set_uri_from_bound_model(self):
         """Using the bound model, set the uri."""
         value = self._uri_template.format(self._bound_model.id)
+        self._set_attr(value)
+
+    def _set_attr(self, value):
+        if self.elm.get(self._uri_attr) == value:
+            return
         self.elm.set(self._uri_attr, value)
+        if self.document is not None:
+            self.document.mark_dirty()
 
     def bind(self, model, template="{}"):
         """Bind the ``model`` to the reference. This uses the model's
@@ -276,54 +287,111 @@ class Reference(object):
 
 
 class HTMLReferenceFinder(object):
-    """Find references within an HTML xml element tree."""
+    """Find references within an HTML xml element tree.
+    The tree is walked once, matching each element against the ``anchors``
+    and ``media`` tables. Results are given with all the anchors first,
+    followed by the matches for each ``media`` row in table order,
+    each in document order.
+    """
+    _xhtml = '{http://www.w3.org/1999/xhtml}'
+
+    #: Anchor tags, referencing by ``href``.
+    anchors = ('a', _xhtml + 'a',)
+    #: ``(tag, attribute, parent tag)`` rows of media references.
+    #: Tags are in Clark notation. When a parent tag is given,
+    #: the element must be its direct child.
+    media = (
+        ('img', 'src', None),
+        ('img', 'longdesc', None),
+        ('audio', 'src', None),
+        ('video', 'src', None),
+        ('object', 'data', None),
+        ('embed', 'src', 'object'),
+        ('source', 'src', None),
+        ('span', 'data-src', None),
+        ('span', 'data-longdesc', None),
+        (_xhtml + 'img', 'src', None),
+        (_xhtml + 'img', 'longdesc', None),
+        (_xhtml + 'audio', 'src', None),
+        (_xhtml + 'video', 'src', None),
+        (_xhtml + 'object', 'data', None),
+        ('embed', 'src', _xhtml + 'object'),
+        (_xhtml + 'source', 'src', None),
+        (_xhtml + 'span', 'data-src', None),
+        (_xhtml + 'span', 'data-longdesc', None),
+        )
 
     def __init__(self, xml):
         self.xml = xml
 
     def __iter__(self):
-        for elm in self._anchors():
+        media_by_tag = {}
+        for i, (tag, attr, parent_tag) in enumerate(self.media):
+            media_by_tag.setdefault(tag, []).append((i, attr, parent_tag))
+        anchors = []
+        media = [[] for row in self.media]
+
+        # Like the ``//`` xpath axis, search the whole document.
+        root = self.xml.getroottree().getroot()
+        for elm in root.iter(etree.Element):
+            tag = elm.tag
+            if tag in self.anchors and elm.get('href') is not None:
+                anchors.append(elm)
+            for i, attr, parent_tag in media_by_tag.get(tag, ()):
+                if elm.get(attr) is None:
+                    continue
+                if parent_tag is not None:
+                    parent = elm.getparent()
+                    if parent is None or parent.tag != parent_tag:
+                        continue
+                media[i].append(elm)
+
+        for elm in anchors:
             yield elm, 'href'
-        for elm, uri_attr in self._media():
-            yield elm, uri_attr
+        for (tag, attr, parent_tag), elms in zip(self.media, media):
+            for elm in elms:
+                yield elm, attr
 
     def apply_xpath(self, xpath, namespaces=None):
         return self.xml.xpath(xpath, namespaces=namespaces)
 
-    def _anchors(self):
-        return self.apply_xpath('//*[self::a[@href]|self::x:a[@href]]',
-                                XHTML_NS)
-
-    def _media(self):
-        media_xpath = [
-                ['//img[@src]', 'src', None],
-                ['//img[@longdesc]', 'longdesc', None],
-                ['//audio[@src]', 'src', None],
-                ['//video[@src]', 'src', None],
-                ['//object[@data]', 'data', None],
-                ['//object/embed[@src]', 'src', None],
-                ['//source[@src]', 'src', None],
-                ['//span[@data-src]', 'data-src', None],
-                ['//span[@data-longdesc]', 'data-longdesc', None],
-                ['//x:img[@src]', 'src', XHTML_NS],
-                ['//x:img[@longdesc]', 'longdesc', XHTML_NS],
-                ['//x:audio[@src]', 'src', XHTML_NS],
-                ['//x:video[@src]', 'src', XHTML_NS],
-                ['//x:object[@data]', 'data', XHTML_NS],
-                ['//x:object/embed[@src]', 'src', XHTML_NS],
-                ['//x:source[@src]', 'src', XHTML_NS],
-                ['//x:span[@data-src]', 'data-src', XHTML_NS],
-                ['//x:span[@data-longdesc]', 'data-longdesc', XHTML_NS],
-                ]
-        for xpath, attr, ns in media_xpath:
-            for elm in self.apply_xpath(xpath, ns):
-                yield elm, attr
-
 
 # ########## #
 #   Models   #
 # ########## #
 
+def _shortid(model):
+    md = getattr(model, 'metadata', {})
+    return md.get('shortId', md.get('cnx-archive-shortid'))
+
+
+class _BinderIndex(object):
+    """Lookup tables for all the nodes within a binder, including itself.
+    Nodes are kept by ``id``, ``ident_hash`` and short id
+    (where these repeat, the node indexed first is kept),
+    along with the path of containing binders leading to each node.
+    """
+
+    def __init__(self, binder):
+        self.paths = {}
+        self.by_id = {}
+        self.by_ident_hash = {}
+        self.by_shortid = {}
+        self.add(binder, ())
+
+    def add(self, node, path):
+        self.paths.setdefault(id(node), path)
+        for table, key in ((self.by_id, node.id),
+                           (self.by_ident_hash, node.ident_hash),
+                           (self.by_shortid, _shortid(node)),):
+            if key is not None:
+                table.setdefault(key, node)
+        if isinstance(node, TranslucentBinder):
+            path = path + (node,)
+            for child in node:
+                self.add(child, path)
+
+
 class TranslucentBinder(MutableSequence):
     """A clear/translucent binder instance.
     This is used only represent ``Binder`` behavior
@@ -345,6 +413,31 @@ class TranslucentBinder(MutableSequence):
             self._title_overrides = utf8(title_overrides)
         else:
             self._title_overrides = [None] * len(self._nodes)
+        # Maps ``id(node)`` to the node's position. Built on demand
+        # and dropped whenever positions shift.
+        self._positions = None
+        # The node index of the whole tree (see ``_BinderIndex``)
+        # and the binders this one is contained in, which are told
+        # about changes to it.
+        self._tree_index = None
+        self._containers = []
+        for node in self._nodes:
+            self._contain(node)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Both are keyed by ``id(node)``, which doesn't survive a copy.
+        state['_positions'] = None
+        state['_tree_index'] = None
+        # A copy isn't within the binders containing this one,
+        # which would otherwise be copied along with it.
+        state['_containers'] = []
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for node in self._nodes:
+            self._contain(node)
 
     @property
     def ident_hash(self):
@@ -354,31 +447,172 @@ class TranslucentBinder(MutableSequence):
     def is_translucent(self):
         return self.__class__ is TranslucentBinder
 
+    def _index_of(self, node):
+        """Position of the given node, by identity rather than equality."""
+        if self._positions is None:
+            self._positions = {}
+            for i, n in enumerate(self._nodes):
+                self._positions.setdefault(id(n), i)
+        try:
+            return self._positions[id(node)]
+        except KeyError:
+            raise ValueError("{!r} is not in binder".format(node))
+
     def set_title_for_node(self, node, title):
-        index = self._nodes.index(node)
+        index = self._index_of(node)
         self._title_overrides[index] = title
 
     def get_title_for_node(self, node):
-        index = self._nodes.index(node)
+        index = self._index_of(node)
         return self._title_overrides[index]
 
+    # Tree index
+    @property
+    def _index(self):
+        if self._tree_index is None:
+            self._tree_index = _BinderIndex(self)
+        return self._tree_index
+
+    def _contain(self, node):
+        if isinstance(node, TranslucentBinder) \
+                and not any(b is self for b in node._containers):
+            node._containers.append(self)
+
+    def _release(self, node):
+        if isinstance(node, TranslucentBinder) \
+                and not any(n is node for n in self._nodes):
+            node._containers = [b for b in node._containers
+                                if b is not self]
+
+    def _binders_affected(self):
+        """This binder and every binder containing it, at any depth."""
+        seen = {}
+        pending = [self]
+        while pending:
+            binder = pending.pop()
+            if id(binder) not in seen:
+                seen[id(binder)] = binder
+                pending.extend(binder._containers)
+        return seen.values()
+
+    def _appended(self, node):
+        """Add the appended node to the indexes that are built."""
+        for binder in self._binders_affected():
+            index = binder._tree_index
+            if index is None:
+                continue
+            path = index.paths.get(id(self))
+            if path is None:
+                binder._tree_index = None
+            else:
+                index.add(node, path + (self,))
+
+    def _changed(self):
+        """Drop the indexes affected by a change in this binder."""
+        self._positions = None
+        for binder in self._binders_affected():
+            binder._tree_index = None
+
+    def clone(self, memo=None):
+        """Copy this binder along with the models within it
+        (see ``Document.clone`` and ``Resource.clone``).
+        The copied metadata is shallow, sharing its values.
+        ``memo`` maps the ``id`` of models already copied to their copy.
+        """
+        if memo is None:
+            memo = {}
+        if id(self) in memo:
+            return memo[id(self)]
+        # Not ``copy.copy``, which would put the clone in the containers
+        # of this binder's nodes (see ``__setstate__``).
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__getstate__())
+        memo[id(self)] = clone
+        clone.metadata = dict(self.metadata)
+        clone._nodes = []
+        for node in self._nodes:
+            node = node.clone(memo)
+            clone._nodes.append(node)
+            clone._contain(node)
+        clone._title_overrides = list(self._title_overrides)
+        if getattr(self, 'resources', None) is not None:
+            clone.resources = [r.clone(memo) for r in self.resources]
+        return clone
+
+    def reindex(self):
+        """Rebuild the node index. Changes to the binders in the tree
+        are followed, but changes to a node's ``id``, ``ident_hash``
+        or short id require this to be called.
+        """
+        self._tree_index = None
+
+    def get_node_by_id(self, id):
+        """Find the node with the given ``id`` within this binder,
+        or ``None``."""
+        return self._index.by_id.get(id)
+
+    def get_node_by_ident_hash(self, ident_hash):
+        """Find the node with the given ``ident_hash`` within this binder,
+        or ``None``."""
+        return self._index.by_ident_hash.get(ident_hash)
+
+    def get_node_by_shortid(self, shortid):
+        """Find the node with the given short id within this binder,
+        or ``None``."""
+        return self._index.by_shortid.get(shortid)
+
+    def get_path(self, node):
+        """The binders leading from this binder down to the given node,
+        excluding the node itself.
+        """
+        try:
+            return self._index.paths[id(node)]
+        except KeyError:
+            raise ValueError("{!r} is not in binder".format(node))
+
+    def get_parent(self, node):
+        """The binder directly containing the given node,
+        or ``None`` for this binder itself."""
+        path = self.get_path(node)
+        return path and path[-1] or None
+
     # ABC methods for MutableSequence
     def __getitem__(self, i):
         return self._nodes[i]
 
     def __setitem__(self, i, v):
+        if isinstance(i, slice):
+            v = list(v)
+        old = self._nodes[i]
         self._nodes[i] = v
+        for node in isinstance(i, slice) and old or [old]:
+            self._release(node)
+        for node in isinstance(i, slice) and v or [v]:
+            self._contain(node)
+        self._changed()
 
     def __delitem__(self, i):
+        old = self._nodes[i]
         del self._nodes[i]
         del self._title_overrides[i]
+        for node in isinstance(i, slice) and old or [old]:
+            self._release(node)
+        self._changed()
 
     def __len__(self):
         return len(self._nodes)
 
     def insert(self, i, v):
+        is_append = i >= len(self._nodes)
         self._nodes.insert(i, v)
         self._title_overrides.insert(i, None)
+        self._contain(v)
+        if not is_append:
+            self._changed()
+            return
+        if self._positions is not None:
+            self._positions.setdefault(id(v), len(self._nodes) - 1)
+        self._appended(v)
 
 
 class Binder(TranslucentBinder):
@@ -448,36 +682,122 @@ class Document(object):
 
     def __init__(self, id, data, metadata=None, resources=None,
                  reference_resolver=None):
-        self._xml = None
         if hasattr(data, 'read'):
             self.content = utf8(data.read())
+        elif isinstance(data, etree._Element):
+            self.content = data
         else:
             self.content = utf8(data)
-        self._references = _parse_references(self._xml)
         self.metadata = utf8(metadata or {})
         self.resources = resources or []
         self.id = id
 
+    def _xml__get(self):
+        """The content's element tree, parsed on first access."""
+        if self._tree is None:
+            self._tree = content_to_etree(self._raw_content)
+            self._raw_content = None
+        return self._tree
+
+    _xml = property(_xml__get, doc=_xml__get.__doc__)
+
     def _content__get(self):
         """Produce the content from the data.
         This is used to write out reference changes that may have
         taken place.
+        The serialized content is kept until the document is marked dirty.
         """
-        return etree_to_content(self._xml)
+        if self._serialized_content is None:
+            self._serialized_content = etree_to_content(self._xml)
+        return self._serialized_content
 
     def _content__set(self, value):
-        self._xml = content_to_etree(value)
-        # reload the references after a content update
-        self._references = _parse_references(self._xml)
+        """Set the content from markup or from an element,
+        which is used as the tree as is.
+        """
+        # Parsing is deferred until the tree or references are needed.
+        self._raw_content = value
+        self._tree = None
+        if isinstance(value, etree._Element):
+            self._raw_content = None
+            self._tree = value
+        self._references = None
+        self._serialized_content = None
+        self._reference_bindings = None
 
     def _content__del(self):
-        self._xml = content_to_etree('')
+        self._content__set('')
 
     content = property(_content__get,
                        _content__set,
                        _content__del,
                        _content__get.__doc__)
 
+    def mark_dirty(self):
+        """Discard the serialized content.
+        Changes made through ``references`` are tracked, but those made
+        directly to the element tree (``_xml``) must be followed by a call
+        to this method to show up in ``content``.
+        """
+        self._serialized_content = None
+
+    def _bind_references(self, bindings, memo=None):
+        """Bind references by position once they are parsed.
+        ``bindings`` is a list of ``(index, model, template)``.
+        Models found in ``memo`` (see ``clone``) are swapped for their copy.
+        """
+        self._reference_bindings = (bindings, memo or {})
+        if self._references is not None:
+            self._apply_reference_bindings()
+
+    def _apply_reference_bindings(self):
+        bindings, memo = self._reference_bindings
+        self._reference_bindings = None
+        for i, model, template in bindings:
+            if i < len(self._references):
+                model = memo.get(id(model), model)
+                self._references[i].bind(model, template)
+
+    def _get_reference_bindings(self):
+        if self._references is None:
+            if self._reference_bindings is None:
+                return []
+            bindings, memo = self._reference_bindings
+            return [(i, memo.get(id(model), model), template)
+                    for i, model, template in bindings]
+        return [(i, ref.bound_model, ref._uri_template)
+                for i, ref in enumerate(self._references)
+                if ref.is_bound]
+
+    def clone(self, memo=None):
+        """Copy this document, sharing the unchanged parts.
+        The copy is given the serialized content and only parses it
+        when its tree or references are needed, so the two never share
+        an element tree. Bound references are bound again in the copy,
+        to the copied model when it is in ``memo``.
+        The resources are copied (see ``Resource.clone``)
+        and the copied metadata is shallow, sharing its values.
+        ``memo`` maps the ``id`` of models already copied to their copy.
+        """
+        if memo is None:
+            memo = {}
+        if id(self) in memo:
+            return memo[id(self)]
+        clone = copy.copy(self)
+        memo[id(self)] = clone
+        clone.metadata = dict(self.metadata)
+        clone.resources = [r.clone(memo) for r in self.resources]
+        bindings = self._get_reference_bindings()
+        if self._tree is None:
+            clone._content__set(self._raw_content)
+        else:
+            content = self.content
+            clone._content__set(content)
+            clone._serialized_content = content
+        if bindings:
+            clone._bind_references(bindings, memo)
+        return clone
+
     @property
     def id(self):
         return self._id
@@ -531,7 +851,9 @@ class Document(object):
         These could be resources, other documents, external links, etc.
         """
         if self._references is None:
-            return []
+            self._references = _parse_references(self._xml, self)
+            if self._reference_bindings is not None:
+                self._apply_reference_bindings()
         return self._references
 
 
@@ -543,6 +865,15 @@ class DocumentPointer(object):
         self.id = ident_hash
         self.metadata = utf8(metadata or {})
 
+    def clone(self, memo=None):
+        """Copy this pointer, see ``Document.clone``."""
+        if memo is None:
+            memo = {}
+        if id(self) not in memo:
+            clone = memo[id(self)] = copy.copy(self)
+            clone.metadata = dict(self.metadata)
+        return memo[id(self)]
+
     @classmethod
     def from_uri(cls, uri):
         parts = urlparse(uri)
@@ -582,6 +913,16 @@ class Resource(object):
     def hash(self):
         return self._hash
 
+    def clone(self, memo=None):
+        """Copy this resource, sharing its data."""
+        if memo is None:
+            memo = {}
+        if id(self) not in memo:
+            clone = memo[id(self)] = copy.copy(self)
+            with self.open() as data:
+                clone._data = io.BytesIO(data.getvalue())
+        return memo[id(self)]
+
     @contextmanager
     def open(self):
         self._data.seek(0)
@@ -11,6 +11,7 @@ Ensures safe parsing for specific elements.
 """
 from __future__ import print_function
 import argparse
+import json
 import logging
 import sys
 from pprint import pformat
@@ -40,13 +41,24 @@ def main(argv=None):
     parser.add_argument('-i', '--input', type=argparse.FileType('r'),
                         help='Read and copy resources/ for output epub.')
 
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Number of processes used to reconstitute'
+                             ' the book (default: 1)')
+
+    parser.add_argument('--id-map', type=argparse.FileType('r'),
+                        help='Read the id map written with the single'
+                             ' html, to restore generated ids from.')
+
     args = parser.parse_args(argv)
 
     if args.input and args.output == sys.stdout:
         raise ValueError('Cannot output to stdout if reading resources')
 
+    id_map = args.id_map and json.load(args.id_map)
+
     from cnxepub.collation import reconstitute
-    binder = reconstitute(args.collated_html)
+    binder = reconstitute(args.collated_html, workers=args.workers,
+                          id_map=id_map)
 
     if args.dump_tree:
         print(pformat(cnxepub.model_to_tree(binder)),
@@ -32,7 +32,7 @@ logger = logging.getLogger('single_html')
 
 
 def single_html(epub_file_path, html_out=sys.stdout, mathjax_version=None,
-                numchapters=None, includes=None):
+                numchapters=None, includes=None, id_map_out=None):
     """Generate complete book HTML."""
     epub = cnxepub.EPUB.from_file(epub_file_path)
     if len(epub) != 1:
@@ -63,6 +63,9 @@ def single_html(epub_file_path, html_out=sys.stdout, mathjax_version=None,
     if hasattr(html_out, 'name'):
         # html_out is a file, close after writing
         html_out.close()
+    if id_map_out is not None:
+        html.write_id_map(id_map_out)
+        id_map_out.close()
 
 
 def apply_numchapters(get_node_type, binder, numchapters):
@@ -115,6 +118,10 @@ def main(argv=None):
                         type=int, const=2, nargs='?', metavar='num_chapters',
                         help="Create subset of complete book "
                         "(default 2 chapters plus extras)")
+    parser.add_argument('--id-map', type=argparse.FileType('w'),
+                        metavar='id_map_out',
+                        help="Write the map of generated element ids "
+                        "to this file, for reconstituting the book")
 
     args = parser.parse_args(argv)
 
@@ -146,4 +153,4 @@ def main(argv=None):
         includes = None
 
     single_html(args.epub_file_path, args.html_out, mathjax_version,
-                args.numchapters, includes)
+                args.numchapters, includes, args.id_map)
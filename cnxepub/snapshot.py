@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+# ###
+# Copyright (c) 2019, Rice University
+# This software is subject to the provisions of the GNU Affero General
+# Public License version 3 (AGPLv3).
+# See LICENCE.txt for details.
+# ###
+"""Binary snapshots of adapted models, to reload a book without
+reading and adapting its EPUB again.
+
+A snapshot holds the binder structure, metadata, title overrides,
+document content, resources and the bindings between references
+and models. Snapshots are pickled, so only load those you wrote.
+"""
+import hashlib
+import io
+import logging
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+
+from .adapters import adapt_epub
+from .epub import EPUB
+from .models import (
+    Binder, TranslucentBinder,
+    Document, CompositeDocument, DocumentPointer, Resource,
+    )
+
+
+__all__ = (
+    'SnapshotError',
+    'epub_hash', 'dump_snapshot', 'load_snapshot',
+    'adapt_epub_cached',
+    )
+
+
+logger = logging.getLogger('cnxepub')
+
+SNAPSHOT_MAGIC = b'CNXEPUB-SNAPSHOT'
+SNAPSHOT_VERSION = 1
+# magic, format version and length of the key that follows
+_HEADER = struct.Struct('>{}sHH'.format(len(SNAPSHOT_MAGIC)))
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is unreadable, of another format version
+    or was made from a different source.
+    """
+
+
+def epub_hash(file):
+    """SHA-1 hex digest of the EPUB ``file``, which is a path
+    to an ``.epub`` file or a directory, or a file-like object.
+    """
+    hasher = hashlib.sha1()
+    if hasattr(file, 'read'):
+        file.seek(0)
+        for chunk in iter(lambda: file.read(65536), b''):
+            hasher.update(chunk)
+        file.seek(0)
+    elif os.path.isdir(file):
+        for root, dirs, filenames in os.walk(file):
+            dirs.sort()
+            for filename in sorted(filenames):
+                filepath = os.path.join(root, filename)
+                relpath = os.path.relpath(filepath, file)
+                hasher.update(relpath.replace(os.sep, '/').encode('utf-8'))
+                with open(filepath, 'rb') as fb:
+                    hasher.update(fb.read())
+    else:
+        with open(file, 'rb') as fb:
+            for chunk in iter(lambda: fb.read(65536), b''):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class _Dumper(object):
+    """Flattens models to plain data. Every model is numbered on first
+    sight, so models used in several places are written once.
+    """
+
+    def __init__(self):
+        self.numbers = {}
+        self.records = []
+
+    def number(self, model):
+        try:
+            return self.numbers[id(model)]
+        except KeyError:
+            pass
+        number = self.numbers[id(model)] = len(self.records)
+        self.records.append(None)
+        self.records[number] = self.record(model)
+        return number
+
+    def record(self, model):
+        if isinstance(model, TranslucentBinder):
+            return {
+                'type': model.is_translucent and 'translucent' or 'binder',
+                'id': model.id,
+                'metadata': model.metadata,
+                'nodes': [self.number(node) for node in model],
+                'title_overrides': list(model._title_overrides),
+                'resources': [self.number(r)
+                              for r in getattr(model, 'resources', [])],
+                }
+        elif isinstance(model, Document):
+            resources = [self.number(r) for r in model.resources]
+            return {
+                'type': (isinstance(model, CompositeDocument) and
+                         'composite' or 'document'),
+                'id': model.id,
+                'metadata': model.metadata,
+                'content': model.content,
+                # Parsing the content again drops the tail of its root.
+                'tail': model._xml.tail,
+                'resources': resources,
+                'bindings': [(i, bound_model, template)
+                             for i, bound_model, template
+                             in model._get_reference_bindings()],
+                }
+        elif isinstance(model, DocumentPointer):
+            return {
+                'type': 'pointer',
+                'ident_hash': model.ident_hash,
+                'metadata': model.metadata,
+                }
+        elif isinstance(model, Resource):
+            with model.open() as data:
+                return {
+                    'type': 'resource',
+                    'id': model.id,
+                    'data': data.read(),
+                    'media_type': model.media_type,
+                    'filename': model.filename,
+                    }
+        raise TypeError("Can't snapshot a {!r}".format(model))
+
+    def finish(self):
+        # References are bound to models by number, which is only known
+        # for all of them after the walk. Bindings to models that
+        # are not otherwise reachable can't be written.
+        for record in self.records:
+            if record['type'] not in ('document', 'composite',):
+                continue
+            bindings = []
+            for i, bound_model, template in record['bindings']:
+                if id(bound_model) not in self.numbers:
+                    logger.warning(
+                        "Reference {} in document {} is bound to {!r}, "
+                        "which is not in the snapshot"
+                        .format(i, record['id'], bound_model))
+                    continue
+                bindings.append(
+                    (i, self.numbers[id(bound_model)], template,))
+            record['bindings'] = bindings
+        return self.records
+
+
+def _load_models(records):
+    models = [None] * len(records)
+
+    def load(number):
+        if models[number] is not None:
+            return models[number]
+        record = records[number]
+        type_ = record['type']
+        if type_ == 'resource':
+            model = Resource(record['id'], io.BytesIO(record['data']),
+                             record['media_type'], record['filename'])
+        elif type_ == 'pointer':
+            model = DocumentPointer(record['ident_hash'], record['metadata'])
+        elif type_ in ('document', 'composite',):
+            cls = type_ == 'composite' and CompositeDocument or Document
+            model = cls(record['id'], record['content'],
+                        metadata=record['metadata'],
+                        resources=[load(r) for r in record['resources']])
+            if record['tail']:
+                model._xml.tail = record['tail']
+        else:
+            nodes = [load(n) for n in record['nodes']]
+            if type_ == 'translucent':
+                model = TranslucentBinder(nodes, record['metadata'],
+                                          record['title_overrides'])
+            else:
+                model = Binder(record['id'], nodes, record['metadata'],
+                               record['title_overrides'],
+                               [load(r) for r in record['resources']])
+        models[number] = model
+        return model
+
+    for number in range(len(records)):
+        load(number)
+    for model, record in zip(models, records):
+        if record['type'] in ('document', 'composite',):
+            bindings = [(i, models[n], template)
+                        for i, n, template in record['bindings']]
+            if bindings:
+                model._bind_references(bindings)
+    return models
+
+
+def dump_snapshot(binders, file, key=None):
+    """Write a snapshot of the given binder(s) to ``file``,
+    a file-like object opened for binary writing.
+    ``key``, typically the ``epub_hash`` of the source,
+    is checked again on load.
+    """
+    if not isinstance(binders, (list, tuple,)):
+        binders = [binders]
+    dumper = _Dumper()
+    roots = [dumper.number(binder) for binder in binders]
+    data = {'roots': roots, 'models': dumper.finish()}
+    key = (key or '').encode('ascii')
+    file.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(key)))
+    file.write(key)
+    file.write(zlib.compress(pickle.dumps(data, 2)))
+
+
+def load_snapshot(file, key=None):
+    """Read the binders from the snapshot in ``file``, a file-like object.
+    When a ``key`` is given, it must match the one written.
+    Raises ``SnapshotError`` for anything that can't be used.
+    """
+    header = file.read(_HEADER.size)
+    try:
+        magic, version, key_length = _HEADER.unpack(header)
+    except struct.error:
+        raise SnapshotError("Not a snapshot")
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("Not a snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError("Unsupported snapshot version: {}"
+                            .format(version))
+    snapshot_key = file.read(key_length).decode('ascii')
+    if key is not None and key != snapshot_key:
+        raise SnapshotError("Snapshot is of another source")
+    try:
+        data = pickle.loads(zlib.decompress(file.read()))
+    except Exception as exc:
+        raise SnapshotError("Corrupt snapshot: {}".format(exc))
+    models = _load_models(data['models'])
+    return [models[n] for n in data['roots']]
+
+
+def adapt_epub_cached(file, cache_dir, workers=1):
+    """Adapt the EPUB ``file`` (see ``.adapters.adapt_epub``), reusing
+    the snapshot in ``cache_dir`` made from the same EPUB if there is one.
+    Otherwise the EPUB is adapted and its snapshot is saved.
+    """
+    key = epub_hash(file)
+    filepath = os.path.join(cache_dir, '{}.snapshot'.format(key))
+    try:
+        with open(filepath, 'rb') as fb:
+            return load_snapshot(fb, key)
+    except (IOError, OSError, SnapshotError):
+        pass
+
+    with EPUB.from_file(file, extract=False, workers=workers) as epub:
+        binders = adapt_epub(epub, workers=workers)
+        # Write to a temporary file first, so that concurrent readers
+        # never see a partial snapshot.
+        fd, temp_filepath = tempfile.mkstemp('.snapshot', dir=cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as fb:
+                dump_snapshot(binders, fb, key)
+            os.rename(temp_filepath, filepath)
+        except Exception:
+            os.remove(temp_filepath)
+            raise
+    return binders
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# ###
+# Copyright (c) 2013, Rice University
+# This software is subject to the provisions of the GNU Affero General
+# Public License version 3 (AGPLv3).
+# See LICENCE.txt for details.
+# ###
+"""Registry of the jinja2 templates used to render EPUB and HTML files.
+
+Templates are registered by name and compiled once, on first use,
+in an environment shared by all the renderers. Set the
+``CNXEPUB_TEMPLATE_CACHE`` environment variable to a directory
+(or use ``set_bytecode_cache``) to also keep the compiled templates
+on disk between processes.
+"""
+import os
+
+import jinja2
+
+
+__all__ = (
+    'register_template', 'get_template', 'set_bytecode_cache',
+    )
+
+
+TEMPLATE_CACHE_ENV_VAR = 'CNXEPUB_TEMPLATE_CACHE'
+
+_sources = {}
+
+
+def _isdict(v):
+    return isinstance(v, dict)
+
+
+environment = jinja2.Environment(loader=jinja2.DictLoader(_sources),
+                                 trim_blocks=True, lstrip_blocks=True,
+                                 # Sources only change through
+                                 # ``register_template``.
+                                 auto_reload=False)
+environment.globals['isdict'] = _isdict
+
+
+def register_template(name, source):
+    """Register the template ``source`` under the given ``name``."""
+    _sources[name] = source
+    # Drop any previously compiled version.
+    environment.cache.clear()
+
+
+def get_template(name):
+    """Get the compiled template registered as ``name``."""
+    return environment.get_template(name)
+
+
+def set_bytecode_cache(directory):
+    """Cache compiled templates in the given ``directory``,
+    or stop doing so when ``directory`` is ``None``.
+    """
+    if directory is None:
+        environment.bytecode_cache = None
+    else:
+        environment.bytecode_cache = \
+            jinja2.FileSystemBytecodeCache(directory)
+    environment.cache.clear()
+
+
+set_bytecode_cache(os.environ.get(TEMPLATE_CACHE_ENV_VAR) or None)
@@ -62,6 +62,30 @@ class EPUBTestCase(unittest.TestCase):
         shutil.copytree(src, dst)
         return dst
 
+    def make_multi_package(self):
+        """Combine the 'book' and 'loose-pages' test data into one
+        epub directory containing two packages, in that order.
+        """
+        directory = self.copy(os.path.join(TEST_DATA_DIR, 'book'), 'multi')
+        loose_pages = os.path.join(TEST_DATA_DIR, 'loose-pages')
+        for dirname in ('content', 'resources',):
+            for filename in os.listdir(os.path.join(loose_pages, dirname)):
+                shutil.copy(os.path.join(loose_pages, dirname, filename),
+                            os.path.join(directory, dirname, filename))
+        shutil.copy(os.path.join(loose_pages, 'faux.opf'), directory)
+        rootfiles = ''.join([
+            '<rootfile full-path="{}" '
+            'media-type="application/oebps-package+xml"/>'.format(x)
+            for x in ('9b0903d2-13c4-4ebe-9ffe-1ee79db28482@1.6.opf',
+                      'faux.opf',)])
+        with open(os.path.join(directory, 'META-INF', 'container.xml'),
+                  'w') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>'
+                    '<container xmlns="urn:oasis:names:tc:opendocument:'
+                    'xmlns:container" version="1.0">'
+                    '<rootfiles>{}</rootfiles></container>'.format(rootfiles))
+        return directory
+
 
 # noqa from http://stackoverflow.com/questions/4219717/how-to-assert-output-with-nosetest-unittest-in-python
 @contextmanager
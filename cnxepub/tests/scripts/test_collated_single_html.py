@@ -8,9 +8,14 @@
 import io
 import mimetypes
 import os.path
+import shutil
 import sys
 import tempfile
 import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
 
 from lxml import etree
 
@@ -53,3 +58,35 @@ class CollatedSingleHTMLTestCase(unittest.TestCase):
             self.assertIn("'title': 'Fruity'", stdout.read())
         else:
             self.assertIn("'title': u'Fruity'", stdout.read())
+
+    def test_valid_with_workers(self):
+        return_code = self.target([self.path_to_xhtml, '--workers', '2'])
+        self.assertEqual(return_code, 0)
+
+    def test_valid_with_id_map(self):
+        from ...collation import reconstitute
+        from ...models import flatten_to_documents
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        id_map_path = os.path.join(tmpdir, 'desserts-id-map.json')
+        # The map written with the single html says what the generated ids
+        # were before, rather than leaving them to be guessed.
+        with open(id_map_path, 'w') as f:
+            f.write('{"auto_chocolate_list":["chocolate@draft","desserts"]}')
+
+        binders = []
+
+        def keep_reconstituted(*args, **kwargs):
+            binders.append(reconstitute(*args, **kwargs))
+            return binders[-1]
+
+        with mock.patch('cnxepub.collation.reconstitute', keep_reconstituted):
+            return_code = self.target([self.path_to_xhtml,
+                                       '--id-map', id_map_path])
+        self.assertEqual(return_code, 0)
+
+        chocolate = [document for document in flatten_to_documents(binders[0])
+                     if document.id == 'page_chocolate'][0]
+        self.assertIn(b'<div data-type="list" id="desserts">',
+                      chocolate.content)
+        self.assertNotIn(b'auto_', chocolate.content)
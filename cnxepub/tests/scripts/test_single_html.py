@@ -6,8 +6,10 @@
 # See LICENCE.txt for details.
 # ###
 
+import json
 import mimetypes
 import os.path
+import shutil
 import sys
 import tempfile
 import unittest
@@ -152,3 +154,38 @@ class SingleHTMLTestCase(unittest.TestCase):
         self.root = etree.fromstring(stdout)
         self.assertEqual(2, len(self.xpath('xhtml:body/*[@data-type="unit"]')))
         self.assertEqual(3, len(self.xpath('//*[@data-type="chapter"]')))
+
+    def test_w_id_map(self):
+        import cnxepub
+        from ...models import flatten_to_documents
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        html_path = os.path.join(tmpdir, 'book.xhtml')
+        id_map_path = os.path.join(tmpdir, 'book-id-map.json')
+
+        with captured_output() as (out, err):
+            self.target(['-n', self.epub_path, html_path,
+                         '--id-map', id_map_path])
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual(err.getvalue(), '')
+
+        with open(id_map_path, 'r') as f:
+            id_map = json.load(f)
+        self.assertEqual(id_map, {
+            'auto_e78d4f90-e078-49d2-beac-e95e8be70667_': [
+                'e78d4f90-e078-49d2-beac-e95e8be70667@3', ''],
+            })
+        with open(html_path, 'rb') as f:
+            html = f.read()
+        self.assertIn(b'id="auto_e78d4f90-e078-49d2-beac-e95e8be70667_"',
+                      html)
+
+        # The ids restored from the map are those that would be guessed.
+        contents = [d.content for d in
+                    flatten_to_documents(cnxepub.adapt_single_html(html))]
+        self.assertEqual(
+            [d.content for d in flatten_to_documents(
+                cnxepub.adapt_single_html(html, id_map=id_map))],
+            contents)
+        for content in contents:
+            self.assertNotIn(b'auto_', content)
@@ -20,6 +20,7 @@ except ImportError:
 
 from lxml import etree
 
+from .. import testing
 from ..testing import TEST_DATA_DIR, unescape
 
 
@@ -107,6 +108,118 @@ class EPUBAdaptationTestCase(unittest.TestCase):
         self.assertEqual(tree, expected_tree)
         self.assertEqual(package.metadata['publication_message'], u'Nueva Versión')
 
+    def test_to_binder_w_workers(self):
+        """Pages parsed in a pool of threads make the same models."""
+        from ..adapters import adapt_package
+        from ..models import model_to_tree, flatten_model
+        for package_filepath in (
+                os.path.join(TEST_DATA_DIR, 'book',
+                             '9b0903d2-13c4-4ebe-9ffe-1ee79db28482@1.6.opf'),
+                os.path.join(TEST_DATA_DIR, 'loose-pages', 'faux.opf'),):
+            binder = adapt_package(self.make_package(package_filepath))
+            threaded_binder = adapt_package(
+                self.make_package(package_filepath), workers=4)
+
+            self.assertEqual(model_to_tree(threaded_binder),
+                             model_to_tree(binder))
+            models = list(flatten_model(binder))
+            threaded_models = list(flatten_model(threaded_binder))
+            self.assertEqual([type(m) for m in threaded_models],
+                             [type(m) for m in models])
+            self.assertEqual(
+                [getattr(m, 'content', None) for m in threaded_models],
+                [getattr(m, 'content', None) for m in models])
+
+    def test_pages_parsed_once(self):
+        package_filepath = os.path.join(
+            TEST_DATA_DIR, 'loose-pages', 'faux.opf')
+        package = self.make_package(package_filepath)
+
+        from .. import adapters, models
+        parse_html = mock.Mock(wraps=adapters._parse_html)
+        content_to_etree = mock.Mock(wraps=models.content_to_etree)
+        with mock.patch.object(adapters, '_parse_html', parse_html), \
+                mock.patch.object(models, 'content_to_etree',
+                                  content_to_etree):
+            binder = adapters.adapt_package(package)
+            contents = [getattr(node, 'content', None) for node in binder]
+
+        self.assertEqual(
+            sorted([args[0].name for args, kw in parse_html.call_args_list]),
+            ['fig-bush.xhtml', 'mushroom-cloud.xhtml', 'pointer.xhtml'])
+        self.assertEqual(content_to_etree.call_count, 0)
+        self.assertIn(b'there will be cake', contents[1])
+
+    def test_resources_adapted_once(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        directory = os.path.join(tmpdir, 'loose-pages')
+        shutil.copytree(os.path.join(TEST_DATA_DIR, 'loose-pages'),
+                        directory)
+        for name in ('fig-bush.xhtml', 'mushroom-cloud.xhtml',):
+            filepath = os.path.join(directory, 'content', name)
+            with open(filepath, 'rb') as f:
+                xhtml = f.read()
+            with open(filepath, 'wb') as f:
+                f.write(xhtml.replace(
+                    b'</body>',
+                    b'<img src="../resources/openstax.png"/></body>'))
+        package = self.make_package(os.path.join(directory, 'faux.opf'))
+
+        from .. import adapters
+        resource_cls = mock.Mock(wraps=adapters.Resource)
+        with mock.patch.object(adapters, 'Resource', resource_cls):
+            binder = adapters.adapt_package(package)
+
+        resources = [binder[0].resources[0], binder[1].resources[0]]
+        self.assertIs(resources[0], resources[1])
+        self.assertEqual(resource_cls.call_count, 1)
+        self.assertIs(binder[1].references[-1].bound_model, resources[0])
+
+        # Adapting again makes new resources.
+        other_binder = adapters.adapt_package(package)
+        self.assertIsNot(other_binder[0].resources[0], resources[0])
+
+    def test_release_items(self):
+        package_filepath = os.path.join(
+            TEST_DATA_DIR, 'loose-pages', 'faux.opf')
+        package = self.make_package(package_filepath)
+
+        from ..adapters import adapt_package
+        binder = adapt_package(package, release_items=True)
+
+        self.assertEqual([item.is_loaded for item in package],
+                         [False] * len(package))
+        self.assertFalse(hasattr(binder[1], '_html'))
+        self.assertFalse(hasattr(binder[1], '_item'))
+        # The models keep what they need.
+        self.assertIn(b'there will be cake', binder[1].content)
+        # The content's tree is only the body, not the source page.
+        root = binder[1]._xml.getroottree().getroot()
+        self.assertEqual(root.tag, '{http://www.w3.org/1999/xhtml}body')
+        self.assertEqual(root.xpath('//xhtml:head', namespaces={
+            'xhtml': 'http://www.w3.org/1999/xhtml'}), [])
+
+    @mock.patch('cnxepub.adapters.logger')
+    def test_parse_error_order_w_workers(self, logger):
+        """Parsing errors are raised in navigation order."""
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        directory = os.path.join(tmpdir, 'loose-pages')
+        shutil.copytree(os.path.join(TEST_DATA_DIR, 'loose-pages'),
+                        directory)
+        for name in ('mushroom-cloud.xhtml', 'pointer.xhtml',):
+            with open(os.path.join(directory, 'content', name), 'w') as f:
+                f.write('<html><body>')
+
+        from ..adapters import adapt_package
+        package = self.make_package(os.path.join(directory, 'faux.opf'))
+        with self.assertRaises(etree.XMLSyntaxError):
+            adapt_package(package, workers=4)
+
+        self.assertEqual(logger.error.call_args_list,
+                         [mock.call('failed parsing mushroom-cloud.xhtml')])
+
     def test_to_translucent_binder(self):
         """Adapts a ``Package`` to a ``TranslucentBinder``.
         Translucent binders are native object representations of data,
@@ -276,6 +389,62 @@ class EPUBAdaptationTestCase(unittest.TestCase):
 
 
 @mock.patch('mimetypes.guess_extension', new=random_extension)
+class InspectEPUBTestCase(unittest.TestCase):
+    maxDiff = None
+
+    def test_inspect(self):
+        from ..epub import pack_epub
+        epub_filepath = tempfile.mkstemp('.epub')[1]
+        self.addCleanup(os.remove, epub_filepath)
+        pack_epub(os.path.join(TEST_DATA_DIR, 'book'), epub_filepath)
+
+        from .. import epub
+        read_member = mock.Mock(wraps=epub._read_member)
+        with mock.patch.object(epub, '_read_member', read_member):
+            from ..adapters import inspect_epub
+            packages = inspect_epub(epub_filepath)
+
+        # Only the navigation document is read from the package's items.
+        self.assertEqual(
+            [args[1] for args, kwargs in read_member.call_args_list],
+            ['content/9b0903d2-13c4-4ebe-9ffe-1ee79db28482@1.6.xhtml'])
+
+        self.assertEqual(len(packages), 1)
+        package = packages[0]
+        self.assertEqual(package['name'],
+                         '9b0903d2-13c4-4ebe-9ffe-1ee79db28482@1.6.opf')
+        self.assertEqual(package['metadata']['publication_message'],
+                         u'Nueva Versión')
+        tree = package['tree']
+        self.assertEqual(tree['id'],
+                         '9b0903d2-13c4-4ebe-9ffe-1ee79db28482@1.6.xhtml')
+        self.assertEqual(tree['title'], 'Book of Infinity')
+        self.assertEqual([x['title'] for x in tree['contents']],
+                         ['Part One', 'Part Two'])
+        self.assertEqual(
+            tree['contents'][0]['contents'][0]['contents'][0],
+            {'id': 'e78d4f90-e078-49d2-beac-e95e8be70667@3.xhtml',
+             'shortid': None,
+             'title': 'Document One'})
+
+
+class AdaptEPUBTestCase(testing.EPUBTestCase):
+
+    def test_adapt_w_workers(self):
+        from ..epub import EPUB
+        from ..adapters import adapt_epub
+        epub = EPUB.from_file(self.make_multi_package())
+
+        binders = adapt_epub(epub, workers=4)
+
+        self.assertEqual(
+            [(b.id, b.metadata['title']) for b in binders],
+            [('9b0903d2-13c4-4ebe-9ffe-1ee79db28482', 'Book of Infinity'),
+             (None, 'Loose Pages')])
+        self.assertEqual(len(binders[0]), 2)
+        self.assertEqual(len(binders[1]), 3)
+
+
 class ModelsToEPUBTestCase(unittest.TestCase):
 
     def test_loose_pages_wo_resources(self):
@@ -504,6 +673,143 @@ class ModelsToEPUBTestCase(unittest.TestCase):
         self.assertEqual(document.metadata['keywords'],
                          base_metadata['keywords'])
 
+    def test_shared_resources_and_documents(self):
+        """Resources and documents used more than once are packaged once."""
+        from ..models import TranslucentBinder, Document, Resource
+        with open(os.path.join(TEST_DATA_DIR, '1x1.jpg'), 'rb') as f:
+            jpg = Resource('1x1.jpg', io.BytesIO(f.read()), 'image/jpeg',
+                           filename='1x1.jpg')
+        metadata = {'title': 'shared', 'version': 'draft'}
+        shared = Document('shared', io.BytesIO(
+            b'<body><p><img src="1x1.jpg" /></p></body>'),
+            metadata=metadata.copy(), resources=[jpg])
+        other = Document('other', io.BytesIO(
+            b'<body><p><img src="1x1.jpg" /></p></body>'),
+            metadata=dict(metadata, title='other'), resources=[jpg])
+        binder = TranslucentBinder([shared, other, shared],
+                                   metadata={'title': "Kraken"})
+
+        from ..adapters import _make_package
+        package = _make_package(binder)
+
+        names = sorted([i.name for i in package])
+        self.assertEqual(len(names), 4)
+        self.assertEqual(names[0], '1x1.jpg')
+        self.assertEqual(package.grab_by_media_type('image/jpeg'),
+                         [package.grab_by_name('1x1.jpg')])
+
+    def test_inline_resources(self):
+        """Data URIs are made into resources."""
+        from ..models import (
+            TranslucentBinder, Document, INLINE_REFERENCE_TYPE,
+            )
+        from ..data_uri import DataURI
+        with open(os.path.join(TEST_DATA_DIR, '1x1.jpg'), 'rb') as f:
+            jpg = f.read()
+        uri = DataURI.make('image/jpeg', None, True, jpg).wrap()
+        document = Document('inline', io.BytesIO(
+            '<body><p><img src="{}" /></p></body>'.format(uri)
+            .encode('utf-8')),
+            metadata={'title': 'inline', 'version': 'draft'})
+        binder = TranslucentBinder([document], metadata={'title': "Kraken"})
+
+        from ..adapters import _make_package
+        package = _make_package(binder)
+
+        items = package.grab_by_media_type('image/jpeg')
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0].data.read(), jpg)
+        content = package.grab_by_name('inline@draft.xhtml').data.read()
+        self.assertIn('"../resources/{}"'.format(items[0].name)
+                      .encode('utf-8'), content)
+        # The binder given is left as it is.
+        self.assertEqual(document.resources, [])
+        self.assertEqual(document.references[0].remote_type,
+                         INLINE_REFERENCE_TYPE)
+
+    def test_duplicate_resources(self):
+        """Resources with the same data are packaged once."""
+        from ..models import TranslucentBinder, Document, Resource
+        from ..data_uri import DataURI
+        with open(os.path.join(TEST_DATA_DIR, '1x1.jpg'), 'rb') as f:
+            data = f.read()
+        jpg = Resource('1x1.jpg', io.BytesIO(data), 'image/jpeg',
+                       filename='1x1.jpg')
+        copied_jpg = Resource('copy.jpg', io.BytesIO(data), 'image/jpeg',
+                              filename='copy.jpg')
+        uri = DataURI.make('image/jpeg', None, True, data)
+        metadata = {'title': 'original', 'version': 'draft'}
+        original = Document('original', io.BytesIO(
+            b'<body><p><img src="1x1.jpg" /></p></body>'),
+            metadata=metadata.copy(), resources=[jpg])
+        copy = Document('copy', io.BytesIO(
+            '<body><p><img src="copy.jpg" /><img src="{0}" />'
+            '<img src="{0}" /></p></body>'.format(uri).encode('utf-8')),
+            metadata=dict(metadata, title='copy'), resources=[copied_jpg])
+        binder = TranslucentBinder([original, copy],
+                                   metadata={'title': "Kraken"})
+
+        from ..adapters import _make_package
+        package = _make_package(binder)
+
+        self.assertEqual(package.grab_by_media_type('image/jpeg'),
+                         [package.grab_by_name('1x1.jpg')])
+        content = package.grab_by_name('copy@draft.xhtml').data.read()
+        self.assertEqual(content.count(b'src="../resources/1x1.jpg"'), 3)
+        self.assertNotIn(b'copy.jpg', content)
+        # The binder given is left as it is.
+        self.assertEqual(copy.resources, [copied_jpg])
+        self.assertEqual([r.uri for r in copy.references],
+                         ['copy.jpg', uri, uri])
+
+    def test_duplicate_resources_w_media_types(self):
+        """Resources with the same data of another media-type are kept."""
+        from ..models import TranslucentBinder, Document, Resource
+        empty_png = Resource('empty.png', io.BytesIO(b''), 'image/png')
+        empty_txt = Resource('empty.txt', io.BytesIO(b''), 'text/plain')
+        document = Document('empty', io.BytesIO(
+            b'<body><img src="empty.png" /><a href="empty.txt">.</a></body>'),
+            metadata={'title': 'empty', 'version': 'draft'},
+            resources=[empty_png, empty_txt])
+        binder = TranslucentBinder([document], metadata={'title': "Kraken"})
+
+        from ..adapters import _make_package
+        package = _make_package(binder)
+
+        self.assertEqual(package.grab_by_name('empty.png').media_type,
+                         'image/png')
+        self.assertEqual(package.grab_by_name('empty.txt').media_type,
+                         'text/plain')
+        content = package.grab_by_name('empty@draft.xhtml').data.read()
+        self.assertIn(b'src="../resources/empty.png"', content)
+        self.assertIn(b'href="../resources/empty.txt"', content)
+
+    @mock.patch('cnxepub.adapters.logger')
+    def test_resources_w_same_name(self, logger):
+        """Of resources named alike, the first is packaged."""
+        from ..models import TranslucentBinder, Document, Resource
+        metadata = {'version': 'draft'}
+        cow = Document('cow', io.BytesIO(
+            b'<body><img src="animal.png" /></body>'),
+            metadata=dict(metadata, title='cow'),
+            resources=[Resource('animal.png', io.BytesIO(b'moo'),
+                                'image/png')])
+        pig = Document('pig', io.BytesIO(
+            b'<body><img src="animal.png" /></body>'),
+            metadata=dict(metadata, title='pig'),
+            resources=[Resource('animal.png', io.BytesIO(b'oink'),
+                                'image/png')])
+        binder = TranslucentBinder([cow, pig], metadata={'title': "Farm"})
+
+        from ..adapters import _make_package
+        package = _make_package(binder)
+
+        self.assertEqual(package.grab_by_media_type('image/png'),
+                         [package.grab_by_name('animal.png')])
+        self.assertEqual(package.grab_by_name('animal.png').data.read(),
+                         b'moo')
+        self.assertEqual(logger.warning.call_count, 1)
+
     def test_binder(self):
         """Create an EPUB from a binder with a few documents."""
         from ..models import Binder, Document, DocumentPointer, Resource
@@ -881,6 +1187,86 @@ Pointer.
                       extra.content)
         self.assertEqual('Extra Stuff', desserts.get_title_for_node(extra))
 
+    def test_pages_not_reparsed(self):
+        """Pages are moved into documents and fixed up in place."""
+        with open(self.page_path, 'rb') as f:
+            html = f.read()
+
+        from .. import adapters, models
+        content_to_etree = mock.Mock(wraps=models.content_to_etree)
+        etree_to_content = mock.Mock(wraps=models.etree_to_content)
+        with mock.patch.object(adapters, 'content_to_etree',
+                               content_to_etree), \
+                mock.patch.object(models, 'content_to_etree',
+                                  content_to_etree), \
+                mock.patch.object(models, 'etree_to_content',
+                                  etree_to_content):
+            desserts = adapters.adapt_single_html(html)
+
+        # Only empty bodies are made, to move the pages into.
+        self.assertEqual(set(args for args, kw
+                             in content_to_etree.call_args_list),
+                         set([('',)]))
+        self.assertEqual(etree_to_content.call_count, 0)
+        from ..models import flatten_to_documents
+        self.assertIn(b'href="/contents/',
+                      b''.join(d.content for d in
+                               flatten_to_documents(desserts)))
+
+    def test_stream(self):
+        """Streaming gives the same models as adapting the whole html."""
+        from ..adapters import (
+            adapt_single_html, adapt_single_html_stream, AdaptationError,
+            )
+        from ..models import model_to_tree, flatten_to_documents
+
+        for filename in ('desserts-single-page.xhtml',
+                         'collated-desserts-single-page.xhtml',
+                         'book-single-page.xhtml'):
+            page_path = os.path.join(TEST_DATA_DIR, filename)
+            with open(page_path, 'rb') as f:
+                html = f.read()
+            binder = adapt_single_html(html)
+            with open(page_path, 'rb') as f:
+                streamed_binder = adapt_single_html_stream(f)
+
+            self.assertEqual(model_to_tree(streamed_binder),
+                             model_to_tree(binder))
+            documents = list(flatten_to_documents(binder))
+            streamed_documents = list(flatten_to_documents(streamed_binder))
+            self.assertEqual([d.metadata for d in streamed_documents],
+                             [d.metadata for d in documents])
+            self.assertEqual([d.content for d in streamed_documents],
+                             [d.content for d in documents])
+
+        for filename in ('desserts-single-page-bad.xhtml',
+                         'desserts-single-page-bad-type.xhtml'):
+            page_path = os.path.join(TEST_DATA_DIR, filename)
+            with self.assertRaises(AdaptationError):
+                adapt_single_html_stream(page_path)
+
+    def test_workers(self):
+        """Adapting chapters in worker processes gives the same models."""
+        from ..adapters import adapt_single_html
+        from ..models import model_to_tree, flatten_to_documents
+
+        for filename in ('desserts-single-page.xhtml',
+                         'collated-desserts-single-page.xhtml',
+                         'book-single-page.xhtml'):
+            with open(os.path.join(TEST_DATA_DIR, filename), 'rb') as f:
+                html = f.read()
+            binder = adapt_single_html(html)
+            pooled_binder = adapt_single_html(html, workers=2)
+
+            self.assertEqual(model_to_tree(pooled_binder),
+                             model_to_tree(binder))
+            documents = list(flatten_to_documents(binder))
+            pooled_documents = list(flatten_to_documents(pooled_binder))
+            self.assertEqual([d.metadata for d in pooled_documents],
+                             [d.metadata for d in documents])
+            self.assertEqual([d.content for d in pooled_documents],
+                             [d.content for d in documents])
+
     def test_missing_title_override(self):
         """Throw error if override titles are missing."""
         page_path = os.path.join(TEST_DATA_DIR, 'desserts-single-page-bad.xhtml')
@@ -178,6 +178,13 @@ class ReconstituteTestCase(unittest.TestCase):
             desserts = reconstitute(html)
         self.check_desserts_ampersand(desserts)
 
+    def test_streaming_w_workers(self):
+        page_path = os.path.join(TEST_DATA_DIR, 'desserts-single-page.xhtml')
+        with open(page_path, 'rb') as html:
+            from cnxepub.collation import reconstitute
+            with self.assertRaises(ValueError):
+                reconstitute(html, streaming=True, workers=2)
+
     def check_desserts_ampersand(self, desserts):
         """Assertions for the desserts model"""
         from ..models import model_to_tree
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# ###
+# Copyright (c) 2019, Rice University
+# This software is subject to the provisions of the GNU Affero General
+# Public License version 3 (AGPLv3).
+# See LICENCE.txt for details.
+# ###
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class DataURITestCase(unittest.TestCase):
+
+    @property
+    def target(self):
+        from ..data_uri import DataURI
+        return DataURI
+
+    def test_base64_in_chunks(self):
+        data = bytes(bytearray(range(256))) * 4
+        uri = self.target.make('application/octet-stream', None, True, data)
+        self.assertTrue(uri.is_base64)
+
+        # Chunks that don't line up with the groups of four characters
+        for chunk_size in (1, 3, 7, 64):
+            with mock.patch('cnxepub.data_uri.CHUNK_SIZE', chunk_size):
+                self.assertEqual(uri.data, data)
+                # Wrapped over lines, as inlined in html
+                self.assertEqual(uri.wrap(40).data, data)
+                self.assertEqual(uri.wrap().data, data)
+
+    def test_percent_encoded_in_chunks(self):
+        data = u'Vacas & café: 100% moo\n'.encode('utf-8') * 3
+        uri = self.target.make('text/plain', 'utf-8', False, data)
+        self.assertFalse(uri.is_base64)
+        self.assertIn('%C3%A9', uri)
+
+        # Escapes are cut at every place by the chunks.
+        for chunk_size in (1, 2, 3, 4, 5, 64):
+            with mock.patch('cnxepub.data_uri.CHUNK_SIZE', chunk_size):
+                self.assertEqual(uri.data, data)
+
+    def test_from_bytes(self):
+        uri = self.target(b'data:text/plain;charset=utf-8,moo%20cow')
+        self.assertTrue(isinstance(uri, str))
+        self.assertEqual(uri, 'data:text/plain;charset=utf-8,moo%20cow')
+        self.assertEqual(uri.mimetype, 'text/plain')
+        self.assertEqual(uri.charset, 'utf-8')
+        self.assertFalse(uri.is_base64)
+        with mock.patch('cnxepub.data_uri.CHUNK_SIZE', 2):
+            self.assertEqual(uri.data, b'moo cow')
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.target('data:text/plain')
+        with self.assertRaises(ValueError):
+            self.target(b'data:not a type,moo')
@@ -5,9 +5,15 @@
 # Public License version 3 (AGPLv3).
 # See LICENCE.txt for details.
 # ###
+import io
 import os
+import sys
 import tempfile
 import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
 
 from lxml import etree
 
@@ -72,6 +78,61 @@ class EPUBTestCase(testing.EPUBTestCase):
             contents = fb.read().strip()
             self.assertEqual(contents, EPUB_MIMETYPE_CONTENTS)
 
+    def test_obj_from_epub_file_wo_extraction(self):
+        """Test that we can read an .epub file in place."""
+        epub_filepath = self.pack_epub(os.path.join(TEST_DATA_DIR, 'book'))
+
+        with self.target_cls.from_file(epub_filepath, extract=False) as epub:
+            # Nothing was unpacked to the filesystem.
+            self.assertEqual(epub._root, None)
+            self.assertEqual(len(epub), 1)
+            package = epub[0]
+            self.assertEqual(len(package), 4)
+            item = package.grab_by_name('e3d625fe893b3f1f9aaef3bdf6bfa15c.png')
+            with open(os.path.join(TEST_DATA_DIR, 'book', 'resources',
+                                   item.name), 'rb') as fb:
+                self.assertEqual(item.data.read(), fb.read())
+        self.assertEqual(epub._archive, None)
+
+    def test_obj_from_epub_stream_wo_extraction(self):
+        """Test that we can read an in-memory .epub in place."""
+        epub_filepath = self.pack_epub(os.path.join(TEST_DATA_DIR, 'book'))
+        with open(epub_filepath, 'rb') as fb:
+            stream = io.BytesIO(fb.read())
+
+        with self.target_cls.from_file(stream, extract=False) as epub:
+            self.assertEqual(len(epub), 1)
+            self.assertTrue(epub[0].navigation.is_navigation)
+
+    def test_close_removes_extracted_files(self):
+        """Test that the temporarily extracted files are cleaned up."""
+        epub_filepath = self.pack_epub(os.path.join(TEST_DATA_DIR, 'blank'))
+
+        with self.target_cls.from_file(epub_filepath) as epub:
+            root = epub._root
+            self.assertTrue(os.path.isdir(root))
+        self.assertFalse(os.path.exists(root))
+
+        # A directory given by the caller is left alone.
+        epub_dirpath = os.path.join(TEST_DATA_DIR, 'blank')
+        with self.target_cls.from_file(epub_dirpath) as epub:
+            pass
+        self.assertTrue(os.path.isdir(epub_dirpath))
+
+    def test_obj_from_multi_package_w_workers(self):
+        """Test that packages parsed in a pool of threads
+        are kept in container order."""
+        epub_filepath = self.pack_epub(self.make_multi_package())
+
+        with self.target_cls.from_file(epub_filepath, extract=False,
+                                       workers=4) as epub:
+            self.assertEqual(
+                [package.name for package in epub],
+                ['9b0903d2-13c4-4ebe-9ffe-1ee79db28482@1.6.opf',
+                 'faux.opf'])
+            self.assertEqual(len(epub[0]), 4)
+            self.assertEqual(len(epub[1]), 5)
+
     def test_package_parsing(self):
         """Test that packages are parsed into the EPUB.
         This does not examine whether the packages themselves are correct,
@@ -206,6 +267,112 @@ class PackageTestCase(testing.EPUBTestCase):
         self.assertEqual(len(epub2), 1)
         self.assertEqual(len(epub2[0]), 4)
 
+    def test_item_lookups(self):
+        package_filepath = os.path.join(
+            TEST_DATA_DIR, 'book',
+            "9b0903d2-13c4-4ebe-9ffe-1ee79db28482@1.6.opf")
+        package = self.make_one(package_filepath)
+
+        name = "e3d625fe893b3f1f9aaef3bdf6bfa15c.png"
+        item = package.grab_by_name(name)
+        self.assertEqual(item.name, name)
+        self.assertEqual(package.grab_by_href('resources/' + name), item)
+        self.assertEqual(
+            package.grab_by_href('content/../resources/' + name), item)
+        with self.assertRaises(KeyError):
+            package.grab_by_name('missing.png')
+        with self.assertRaises(KeyError):
+            package.grab_by_href('content/' + name)
+
+        self.assertEqual(
+            [i.name for i in package.grab_by_media_type('image/png')],
+            ['e3d625fe893b3f1f9aaef3bdf6bfa15c.png', 'cover.png'])
+        self.assertEqual(package.grab_by_media_type('video/mp4'), [])
+
+    def test_item_mutation(self):
+        package_filepath = os.path.join(
+            TEST_DATA_DIR, 'book',
+            "9b0903d2-13c4-4ebe-9ffe-1ee79db28482@1.6.opf")
+        package = self.make_one(package_filepath)
+
+        from ..epub import (
+            Item, DuplicateItemError, AdditionalNavigationError,
+            MissingNavigationError,
+            )
+        item = Item('extra.png', io.BytesIO(b''), 'image/png')
+        package.append(item)
+        self.assertEqual(len(package), 5)
+        self.assertEqual(package.grab_by_name('extra.png'), item)
+        self.assertEqual(package.grab_by_media_type('image/png')[-1], item)
+
+        with self.assertRaises(DuplicateItemError):
+            package.append(Item('extra.png', io.BytesIO(b''), 'image/png'))
+        with self.assertRaises(AdditionalNavigationError):
+            package.append(Item('nav.xhtml', io.BytesIO(b''),
+                                'application/xhtml+xml', is_navigation=True))
+        self.assertEqual(len(package), 5)
+
+        package.remove(item)
+        with self.assertRaises(KeyError):
+            package.grab_by_name('extra.png')
+        self.assertNotIn(item, package.grab_by_media_type('image/png'))
+
+        package.remove(package.navigation)
+        with self.assertRaises(MissingNavigationError):
+            package.navigation
+
+    def test_item_slice_mutation(self):
+        from ..epub import (
+            Package, Item, DuplicateItemError, AdditionalNavigationError,
+            )
+        nav = Item('nav.xhtml', io.BytesIO(b''), 'application/xhtml+xml',
+                   is_navigation=True)
+        a = Item('a.png', io.BytesIO(b''), 'image/png')
+        b = Item('b.png', io.BytesIO(b''), 'image/png')
+        c = Item('c.png', io.BytesIO(b''), 'image/png')
+        package = Package('book.opf', [nav, a, b])
+
+        self.assertEqual(package[1:], [a, b])
+        del package[1:]
+        self.assertEqual(list(package), [nav])
+        with self.assertRaises(KeyError):
+            package.grab_by_name('a.png')
+        self.assertEqual(package.grab_by_media_type('image/png'), [])
+
+        package[1:] = [a, b]
+        self.assertEqual(list(package), [nav, a, b])
+        self.assertEqual(package.grab_by_name('b.png'), b)
+
+        # A failed assignment leaves the package as it was.
+        with self.assertRaises(DuplicateItemError):
+            package[:2] = [c, Item('b.png', io.BytesIO(b''), 'image/png')]
+        with self.assertRaises(AdditionalNavigationError):
+            package[1:] = [Item('nav2.xhtml', io.BytesIO(b''),
+                                'application/xhtml+xml', is_navigation=True)]
+        self.assertEqual(list(package), [nav, a, b])
+        self.assertEqual(package.navigation, nav)
+        with self.assertRaises(KeyError):
+            package.grab_by_name('c.png')
+
+        # The navigation item may be replaced along with others.
+        new_nav = Item('index.xhtml', io.BytesIO(b''),
+                       'application/xhtml+xml', is_navigation=True)
+        package[:2] = [new_nav, c]
+        self.assertEqual(list(package), [new_nav, c, b])
+        self.assertEqual(package.navigation, new_nav)
+        self.assertEqual(package.grab_by_media_type('image/png'), [b, c])
+
+    def test_w_duplicate_item_names(self):
+        from ..epub import Package, Item, DuplicateItemError
+        items = [
+            Item('nav.xhtml', io.BytesIO(b''), 'application/xhtml+xml',
+                 is_navigation=True),
+            Item('a.png', io.BytesIO(b''), 'image/png'),
+            Item('a.png', io.BytesIO(b''), 'image/png'),
+            ]
+        with self.assertRaises(DuplicateItemError):
+            Package('book.opf', items)
+
 
 class WritePackageTestCase(testing.EPUBTestCase):
     """Output the ``Package`` to the filesystem"""
@@ -344,7 +511,17 @@ class WriteEPUBTestCase(testing.EPUBTestCase):
         output_path = self.tmpdir
         epub_filename = 'book.epub'
         epub_filepath = os.path.join(output_path, epub_filename)
-        epub.to_file(epub, epub_filepath)
+        with mock.patch('tempfile.mkdtemp') as mkdtemp:
+            epub.to_file(epub, epub_filepath)
+        # Written straight to the archive, not by way of the filesystem.
+        self.assertFalse(mkdtemp.called)
+
+        # The mimetype entry comes first and is not compressed.
+        import zipfile
+        with zipfile.ZipFile(epub_filepath) as zf:
+            mimetype_info = zf.infolist()[0]
+        self.assertEqual(mimetype_info.filename, 'mimetype')
+        self.assertEqual(mimetype_info.compress_type, zipfile.ZIP_STORED)
 
         # Unpack so we can check the contents...
         from ..epub import unpack_epub
@@ -384,3 +561,192 @@ class WriteEPUBTestCase(testing.EPUBTestCase):
         expected_string = 'full-path="{}"'.format(package_name)
         self.assertTrue(container_xml.find(expected_string) >= 0,
                         container_xml)
+
+    def test_to_file_twice(self):
+        """Writing again gives the same archive, whether the item data
+        was given or is loaded on demand."""
+        import zipfile
+        from ..epub import EPUB, Package, Item
+        filepath = os.path.join(TEST_DATA_DIR, 'book', 'content',
+                                'e78d4f90-e078-49d2-beac-e95e8be70667@3.xhtml')
+        items = [Item.from_file(filepath, eager=eager,
+                                media_type='application/xhtml+xml',
+                                is_navigation=eager,
+                                properties=eager and ['nav'] or None)
+                 for eager in (True, False)]
+        items[1].name = 'lazy.xhtml'
+        epub = EPUB([Package('faux.opf', items, {'title': 'Faux'})])
+
+        results = []
+        for i in range(2):
+            output = io.BytesIO()
+            EPUB.to_file(epub, output)
+            with zipfile.ZipFile(output) as zf:
+                self.assertEqual(zf.testzip(), None)
+                results.append([(info.filename, zf.read(info.filename))
+                                for info in zf.infolist()])
+            # Only the data given up front stays loaded.
+            self.assertEqual([item.is_loaded for item in items],
+                             [True, False])
+        self.assertEqual(results[0], results[1])
+        with open(filepath, 'rb') as fb:
+            self.assertIn(fb.read(), [data for name, data in results[0]])
+
+
+class ItemTestCase(testing.EPUBTestCase):
+
+    filepath = os.path.join(TEST_DATA_DIR, 'book', 'resources',
+                            'e3d625fe893b3f1f9aaef3bdf6bfa15c.png')
+
+    def test_lazy_data(self):
+        """Item data is read on first access and can be released."""
+        from ..epub import Item
+        item = Item.from_file(self.filepath, media_type='image/png')
+        self.assertFalse(item.is_loaded)
+
+        with open(self.filepath, 'rb') as fb:
+            expected = fb.read()
+        self.assertEqual(item.data.read(), expected)
+        self.assertTrue(item.is_loaded)
+
+        item.release()
+        self.assertFalse(item.is_loaded)
+        self.assertEqual(item.data.read(), expected)
+
+    def test_eager_data(self):
+        from ..epub import Item
+        item = Item.from_file(self.filepath, eager=True,
+                              media_type='image/png')
+        self.assertTrue(item.is_loaded)
+        # Data that can't be loaded again is not released.
+        item.release()
+        self.assertTrue(item.is_loaded)
+
+    def test_lazy_data_from_archive(self):
+        epub_filepath = self.pack_epub(os.path.join(TEST_DATA_DIR, 'book'))
+        from ..epub import EPUB
+        with EPUB.from_file(epub_filepath, extract=False) as epub:
+            package = epub[0]
+            self.assertFalse(any([i.is_loaded for i in package]))
+            package.navigation.data.read()
+            self.assertEqual([i.is_navigation for i in package
+                              if i.is_loaded], [True])
+
+
+class PackEPUBTestCase(testing.EPUBTestCase):
+
+    def test_compression_for(self):
+        import zipfile
+        from ..epub import compression_for
+        self.assertEqual(compression_for('image/jpeg'), zipfile.ZIP_STORED)
+        self.assertEqual(compression_for('video/mp4'), zipfile.ZIP_STORED)
+        self.assertEqual(compression_for('application/xhtml+xml'),
+                         zipfile.ZIP_DEFLATED)
+        self.assertEqual(compression_for(None), zipfile.ZIP_DEFLATED)
+
+    def test_media_aware_compression(self):
+        import zipfile
+        from ..epub import pack_epub
+        book_path = os.path.join(TEST_DATA_DIR, 'book')
+        results = []
+        for workers in (1, 3):
+            epub_filepath = os.path.join(
+                self.tmpdir, 'book-{}.epub'.format(workers))
+            pack_epub(book_path, epub_filepath, compresslevel=9,
+                      workers=workers)
+            with zipfile.ZipFile(epub_filepath) as zf:
+                self.assertEqual(zf.testzip(), None)
+                infos = zf.infolist()
+                results.append([(i.filename, i.compress_type,
+                                 zf.read(i.filename)) for i in infos])
+
+            self.assertEqual(infos[0].filename, 'mimetype')
+            compress_types = dict([(i.filename, i.compress_type)
+                                   for i in infos])
+            self.assertEqual(compress_types['mimetype'], zipfile.ZIP_STORED)
+            self.assertEqual(compress_types['resources/cover.png'],
+                             zipfile.ZIP_STORED)
+            self.assertEqual(
+                compress_types['content/'
+                               'e78d4f90-e078-49d2-beac-e95e8be70667@3.xhtml'],
+                zipfile.ZIP_DEFLATED)
+
+        # Written in the same order with the same contents.
+        self.assertEqual(results[0], results[1])
+
+    @unittest.skipIf(sys.version_info < (3, 7),
+                     "zipfile takes a compression level from Python 3.7")
+    def test_write_members_compresslevel(self):
+        import zipfile
+        from ..epub import write_members
+        data = b''.join([u'{} moo\n'.format(i).encode('ascii')
+                         for i in range(1000)])
+        sizes = []
+        for compresslevel in (0, 9):
+            output = io.BytesIO()
+            with zipfile.ZipFile(output, 'w') as zf:
+                write_members(zf, [('moo.txt', 'text/plain', lambda: data)],
+                              compresslevel=compresslevel)
+            with zipfile.ZipFile(output) as zf:
+                info = zf.getinfo('moo.txt')
+                self.assertEqual(info.compress_type, zipfile.ZIP_DEFLATED)
+                self.assertEqual(zf.read('moo.txt'), data)
+                sizes.append(info.compress_size)
+        self.assertGreater(sizes[0], sizes[1])
+
+    def test_write_members_w_workers(self):
+        import zipfile
+        from .. import epub
+        workers = 3
+        # The number of members written when each member was read
+        written_at_read = {}
+        written = []
+        write_member = epub._write_member
+
+        def write(archive, arcname, *args, **kwargs):
+            write_member(archive, arcname, *args, **kwargs)
+            written.append(arcname)
+
+        def reader(i):
+            def read():
+                written_at_read[i] = len(written)
+                return 'member {}\n'.format(i).encode('ascii') * 100
+            return read
+
+        members = [('{}.txt'.format(i), 'text/plain', reader(i))
+                   for i in range(50)]
+        output = io.BytesIO()
+        with mock.patch.object(epub, '_write_member', write):
+            with zipfile.ZipFile(output, 'w') as zf:
+                epub.write_members(zf, members, workers=workers)
+                zf.writestr('last.txt', b'last')
+
+        with zipfile.ZipFile(output) as zf:
+            self.assertEqual(zf.testzip(), None)
+            self.assertEqual(
+                [i.filename for i in zf.infolist()],
+                ['{}.txt'.format(i) for i in range(50)] + ['last.txt'])
+            self.assertEqual(zf.read('7.txt'), b'member 7\n' * 100)
+        # Members are read only a few ahead of the writer.
+        for i in range(50):
+            self.assertGreaterEqual(written_at_read[i], i - 2 * workers + 1)
+
+    def test_epub_to_file_w_workers(self):
+        import zipfile
+        from ..epub import EPUB, pack_epub
+        epub_filepath = os.path.join(self.tmpdir, 'book.epub')
+        pack_epub(os.path.join(TEST_DATA_DIR, 'book'), epub_filepath)
+
+        results = []
+        with EPUB.from_file(epub_filepath, extract=False) as epub:
+            for workers in (1, 4):
+                output = io.BytesIO()
+                EPUB.to_file(epub, output, workers=workers)
+                with zipfile.ZipFile(output) as zf:
+                    self.assertEqual(zf.testzip(), None)
+                    results.append([(i.filename, zf.read(i.filename))
+                                    for i in zf.infolist()])
+                # Items loaded for writing are released again.
+                self.assertFalse(any([i.is_loaded for i in epub[0]]))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][0], ('mimetype', b'application/epub+zip'))
@@ -961,6 +961,41 @@ class SingleHTMLFormatterTestCase(unittest.TestCase):
                 html,
                 unicode(SingleHTMLFormatter(self.desserts)).encode('utf-8'))
 
+    def test_id_map(self):
+        from ..formatters import SingleHTMLFormatter
+        from ..adapters import adapt_single_html
+        from ..models import flatten_to_documents
+
+        formatter = SingleHTMLFormatter(self.desserts)
+        html = bytes(formatter)
+        expected_id_map = {
+            'auto_chocolate_list': ['chocolate@draft', 'list'],
+            'auto_lemon_link-to-feature-2': ['lemon@draft',
+                                             'link-to-feature-2'],
+            }
+        self.assertEqual(
+            dict((k, list(v)) for k, v in formatter.id_map.items()),
+            expected_id_map)
+
+        id_map_file = IS_PY3 and io.StringIO() or io.BytesIO()
+        formatter.write_id_map(id_map_file)
+        id_map = json.loads(id_map_file.getvalue())
+        self.assertEqual(id_map, expected_id_map)
+
+        contents = [d.content for d in
+                    flatten_to_documents(adapt_single_html(html))]
+        self.assertEqual(
+            [d.content for d in
+             flatten_to_documents(adapt_single_html(html, id_map=id_map))],
+            contents)
+
+        # The original ids are taken from the map.
+        id_map['auto_chocolate_list'][1] = 'desserts'
+        chocolate = list(flatten_to_documents(
+            adapt_single_html(html, id_map=id_map)))[3]
+        self.assertIn(b'<div data-type="list" id="desserts">',
+                      chocolate.content)
+
     @mock.patch('requests.get', mocked_requests_get)
     def test_includes_callback(self):
         from ..formatters import SingleHTMLFormatter
@@ -76,6 +76,173 @@ class ModelAttributesTestCase(BaseModelTestCase):
         self.assertEqual(binder.ident_hash, '456@2')
         self.assertEqual(binder.metadata['version'], '2')
 
+    def test_binder_title_overrides(self):
+        documents = [self.make_document('doc{}@1'.format(i))
+                     for i in range(4)]
+        binder = self.make_binder(nodes=documents[:2])
+        binder.set_title_for_node(documents[0], 'Zero')
+        binder.append(documents[2])
+        binder.set_title_for_node(documents[2], 'Two')
+        self.assertEqual(binder.get_title_for_node(documents[0]), 'Zero')
+        self.assertEqual(binder.get_title_for_node(documents[2]), 'Two')
+
+        binder.insert(0, documents[3])
+        self.assertEqual(binder.get_title_for_node(documents[3]), None)
+        self.assertEqual(binder.get_title_for_node(documents[0]), 'Zero')
+
+        del binder[1]
+        self.assertEqual(binder.get_title_for_node(documents[2]), 'Two')
+        with self.assertRaises(ValueError):
+            binder.get_title_for_node(documents[0])
+
+        binder[1] = documents[0]
+        self.assertEqual(binder.get_title_for_node(documents[0]), None)
+        with self.assertRaises(ValueError):
+            binder.set_title_for_node(documents[1], 'One')
+
+    def test_binder_index(self):
+        doc_one = self.make_document('doc1@1')
+        doc_two = self.make_document('doc2@3',
+                                     metadata={'shortId': 'dOc2'})
+        doc_three = self.make_document('doc3@1')
+        chapter = self.make_binder(nodes=[doc_one])
+        book = self.make_binder('book@1', nodes=[chapter])
+
+        self.assertIs(book.get_node_by_id('book'), book)
+        self.assertIs(book.get_node_by_ident_hash('doc1@1'), doc_one)
+        self.assertEqual(book.get_path(doc_one), (book, chapter))
+        self.assertIs(book.get_parent(doc_one), chapter)
+        self.assertIs(book.get_parent(chapter), book)
+        self.assertIs(book.get_parent(book), None)
+
+        # Appending to a nested binder updates the containing index.
+        chapter.append(doc_two)
+        self.assertIs(book.get_node_by_shortid('dOc2'), doc_two)
+        self.assertIs(book.get_node_by_id('doc2'), doc_two)
+        self.assertIs(book.get_parent(doc_two), chapter)
+
+        unit = self.make_binder(nodes=[doc_three])
+        book.insert(0, unit)
+        self.assertIs(book.get_parent(doc_three), unit)
+        self.assertEqual(book.get_path(doc_two), (book, chapter))
+
+        del chapter[0]
+        self.assertIs(book.get_node_by_id('doc1'), None)
+        with self.assertRaises(ValueError):
+            book.get_parent(doc_one)
+
+        chapter[0] = doc_one
+        self.assertIs(book.get_node_by_id('doc2'), None)
+        self.assertIs(book.get_parent(doc_one), chapter)
+
+        doc_one.id = 'doc4@2'
+        self.assertIs(book.get_node_by_ident_hash('doc4@2'), None)
+        book.reindex()
+        self.assertIs(book.get_node_by_ident_hash('doc4@2'), doc_one)
+
+    def test_binder_clone(self):
+        resource = self.make_resource('cow', io.BytesIO(b'moo'), 'image/png')
+        document = self.make_document(
+            'doc1@1', b'<body><img src="cow"/><p>Moo</p></body>',
+            metadata={'title': 'Cows', 'authors': [{'name': 'Old'}]})
+        document.resources.append(resource)
+        document.references[0].bind(resource, '../resources/{}')
+        chapter = self.make_binder(nodes=[document])
+        book = self.make_binder('book@1', nodes=[chapter],
+                                metadata={'title': 'Farm'})
+        book.set_title_for_node(chapter, 'Animals')
+
+        clone = book.clone()
+
+        self.assertEqual(clone.ident_hash, 'book@1')
+        self.assertEqual(clone.get_title_for_node(clone[0]), 'Animals')
+        document_clone = clone[0][0]
+        self.assertIsNot(document_clone, document)
+        self.assertEqual(document_clone.content, document.content)
+        # Nothing is parsed until the tree is needed.
+        self.assertIs(document_clone._tree, None)
+        # Metadata values are shared, the mappings are not.
+        self.assertIs(document_clone.metadata['authors'],
+                      document.metadata['authors'])
+        document_clone.metadata['title'] = 'Pigs'
+        clone.metadata['publisher'] = 'Farmer'
+        self.assertEqual(document.metadata['title'], 'Cows')
+        self.assertNotIn('publisher', book.metadata)
+
+        # References are bound to the copied resource.
+        resource_clone = document_clone.resources[0]
+        self.assertIsNot(resource_clone, resource)
+        with resource_clone.open() as f:
+            self.assertEqual(f.read(), b'moo')
+        self.assertIs(document_clone.references[0].bound_model,
+                      resource_clone)
+        resource_clone.id = 'pig'
+        self.assertEqual(document_clone.references[0].uri,
+                         '../resources/pig')
+        self.assertEqual(document.references[0].uri, '../resources/cow')
+        self.assertIn(b'../resources/pig', document_clone.content)
+        self.assertIn(b'../resources/cow', document.content)
+
+        clone[0].append(self.make_document('doc2@1'))
+        self.assertEqual(len(chapter), 1)
+        self.assertIs(clone.get_parent(clone[0][1]), clone[0])
+
+    def test_binder_clone_detached(self):
+        chapter = self.make_binder(nodes=[self.make_document('doc1@1')])
+        book = self.make_binder('book@1', nodes=[chapter])
+
+        clones = [book.clone() for i in range(3)]
+
+        # The clones are only contained by their own book.
+        self.assertEqual(chapter._containers, [book])
+        self.assertEqual([c[0]._containers for c in clones],
+                         [[c] for c in clones])
+        clones[0].get_node_by_id('doc1')
+        book.append(self.make_document('doc2@1'))
+        self.assertIsNot(clones[0]._tree_index, None)
+
+    def test_document_clone_of_clone(self):
+        resource = self.make_resource('cow', io.BytesIO(b'moo'), 'image/png')
+        document = self.make_document(
+            'doc1@1', b'<body><img src="cow"/></body>')
+        document.resources.append(resource)
+        document.references[0].bind(resource, '../resources/{}')
+
+        clone = document.clone()
+        # Cloned again before the first clone's references are parsed.
+        self.assertIs(clone._references, None)
+        clone_of_clone = clone.clone()
+
+        self.assertIsNot(clone_of_clone.resources[0], clone.resources[0])
+        self.assertIs(clone_of_clone.references[0].bound_model,
+                      clone_of_clone.resources[0])
+        self.assertIs(clone.references[0].bound_model, clone.resources[0])
+        self.assertIs(document.references[0].bound_model, resource)
+
+    def test_binder_copy_detached(self):
+        import copy
+        import pickle
+        document = self.make_document('doc1@1')
+        chapter = self.make_binder(nodes=[document])
+        book = self.make_binder('book@1', nodes=[chapter])
+        self.assertIs(book.get_parent(chapter), book)
+
+        for chapter_copy in (copy.deepcopy(chapter),
+                             pickle.loads(pickle.dumps(chapter))):
+            self.assertEqual(chapter_copy._containers, [])
+            self.assertIsNot(chapter_copy[0], document)
+            self.assertIs(chapter_copy.get_parent(chapter_copy[0]),
+                          chapter_copy)
+            with self.assertRaises(ValueError):
+                book.get_parent(chapter_copy)
+
+        # Copying the whole book keeps the copy's own containment.
+        book_copy = copy.deepcopy(book)
+        self.assertEqual(book_copy[0]._containers, [book_copy])
+        book_copy[0].append(self.make_document('doc2@1'))
+        self.assertIs(book_copy.get_node_by_id('doc2'), book_copy[0][1])
+        self.assertEqual(len(chapter), 1)
+
     def test_document_attribs(self):
         document = self.make_document('8d75ea29@3')
 
@@ -389,6 +556,91 @@ class ModelBehaviorTestCase(unittest.TestCase):
             ]
         self.assertEqual(expected_uris, [r.uri for r in document.references])
 
+    def test_document_parsed_on_demand(self):
+        content = b'<body><p>Farm <a href="http://example.com">life</a></p></body>'
+        from .. import models
+        content_to_etree = mock.Mock(wraps=models.content_to_etree)
+        with mock.patch.object(models, 'content_to_etree', content_to_etree):
+            document = models.Document('mcdonald@1', content,
+                                       metadata={'title': 'Old McDonald'})
+            self.assertEqual(document.ident_hash, 'mcdonald@1')
+            self.assertEqual(document.metadata['title'], 'Old McDonald')
+            self.assertEqual(content_to_etree.call_count, 0)
+
+            self.assertEqual([r.uri for r in document.references],
+                             ['http://example.com'])
+            self.assertIn(b'Farm', document.content)
+            self.assertEqual(content_to_etree.call_count, 1)
+
+            document.content = b'<body><img src="cow.png"/></body>'
+            self.assertEqual(content_to_etree.call_count, 1)
+            self.assertEqual([r.uri for r in document.references],
+                             ['cow.png'])
+            self.assertEqual(content_to_etree.call_count, 2)
+
+    def test_document_content_serialized_once(self):
+        content = b'<body><a href="cow.png">Cow</a><img src="pig.png"/></body>'
+        from .. import models
+        etree_to_content = mock.Mock(wraps=models.etree_to_content)
+        with mock.patch.object(models, 'etree_to_content', etree_to_content):
+            document = models.Document('mcdonald@1', content)
+            first = document.content
+            self.assertEqual(document.content, first)
+            self.assertEqual(etree_to_content.call_count, 1)
+
+            resource = mock.Mock()
+            resource.id = 'cow.jpg'
+            document.references[0].bind(resource, '../resources/{}')
+            self.assertIn(b'href="../resources/cow.jpg"', document.content)
+            self.assertEqual(etree_to_content.call_count, 2)
+            # Reading the bound uri again changes nothing.
+            document.references[0].uri
+            document.content
+            self.assertEqual(etree_to_content.call_count, 2)
+
+            document.references[1].uri = 'hog.png'
+            self.assertIn(b'src="hog.png"', document.content)
+            self.assertEqual(etree_to_content.call_count, 3)
+
+            document._xml.set('class', 'farm')
+            self.assertNotIn(b'farm', document.content)
+            document.mark_dirty()
+            self.assertIn(b'class="farm"', document.content)
+            self.assertEqual(etree_to_content.call_count, 4)
+
+    def test_reference_finder_order(self):
+        from lxml import etree
+        from ..models import HTMLReferenceFinder
+        xml = etree.fromstring("""\
+<html xmlns="http://www.w3.org/1999/xhtml"><body>
+<img src="x-img.png" longdesc="x-desc"/>
+<a href="#one">one</a>
+<object data="x-obj"><embed xmlns="" src="x-embed"/></object>
+<div xmlns="">
+  <span data-src="span-src"/>
+  <img src="img.png"/>
+  <object data="obj"><embed src="embed"/></object>
+  <embed src="loose-embed"/>
+  <a href="#two">two</a>
+  <a>no href</a>
+</div>
+</body></html>""").find('{http://www.w3.org/1999/xhtml}body')
+
+        found = [(elm.get(attr), attr)
+                 for elm, attr in HTMLReferenceFinder(xml)]
+
+        self.assertEqual(found, [
+            ('#one', 'href'), ('#two', 'href'),
+            ('img.png', 'src'),
+            ('obj', 'data'),
+            ('embed', 'src'),
+            ('span-src', 'data-src'),
+            ('x-img.png', 'src'),
+            ('x-desc', 'longdesc'),
+            ('x-obj', 'data'),
+            ('x-embed', 'src'),
+            ])
+
     def test_document_content(self):
         with open(
             os.path.join(TEST_DATA_DIR,
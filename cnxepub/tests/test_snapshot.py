@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# ###
+# Copyright (c) 2019, Rice University
+# This software is subject to the provisions of the GNU Affero General
+# Public License version 3 (AGPLv3).
+# See LICENCE.txt for details.
+# ###
+import io
+import os
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from .. import testing
+from ..testing import TEST_DATA_DIR
+
+
+class SnapshotTestCase(testing.EPUBTestCase):
+
+    def make_binder(self):
+        from ..models import Binder, TranslucentBinder, Document, Resource
+        resource = Resource('cow', io.BytesIO(b'moo'), 'image/png',
+                            filename='cow.png')
+        document = Document(
+            'doc1@2', b'<body><img src="cow.png"/><p>Moo</p></body>',
+            metadata={'title': u'Vacas', 'authors': [{'name': 'Old'}]},
+            resources=[resource])
+        document.references[0].bind(resource, '../resources/{}')
+        chapter = TranslucentBinder([document], metadata={'title': 'Ch'})
+        binder = Binder('book@1', [chapter], metadata={'title': 'Farm'},
+                        title_overrides=['Animals'], resources=[resource])
+        return binder
+
+    def test_round_trip(self):
+        from ..models import model_to_tree, Document
+        from ..snapshot import dump_snapshot, load_snapshot
+        binder = self.make_binder()
+
+        snapshot = io.BytesIO()
+        dump_snapshot(binder, snapshot, key='abc')
+        snapshot.seek(0)
+        binders = load_snapshot(snapshot, key='abc')
+
+        self.assertEqual(len(binders), 1)
+        loaded = binders[0]
+        self.assertEqual(model_to_tree(loaded), model_to_tree(binder))
+        document = loaded[0][0]
+        self.assertEqual(type(document), Document)
+        self.assertEqual(document.metadata, binder[0][0].metadata)
+        self.assertEqual(document.content, binder[0][0].content)
+        # Resources used in several places are loaded once
+        # and references are bound to them again.
+        resource = loaded.resources[0]
+        self.assertIs(document.resources[0], resource)
+        self.assertIs(document.references[0].bound_model, resource)
+        with resource.open() as f:
+            self.assertEqual(f.read(), b'moo')
+        self.assertEqual(resource.filename, 'cow.png')
+        resource.id = 'pig'
+        self.assertEqual(document.references[0].uri, '../resources/pig')
+
+    @mock.patch('cnxepub.snapshot.logger')
+    def test_unreachable_binding(self, logger):
+        from ..models import Resource
+        from ..snapshot import dump_snapshot, load_snapshot
+        binder = self.make_binder()
+        # Bound to a resource that isn't in the binder
+        pig = Resource('pig', io.BytesIO(b'oink'), 'image/png')
+        binder[0][0].references[0].bind(pig, '../resources/{}')
+
+        snapshot = io.BytesIO()
+        dump_snapshot(binder, snapshot)
+        snapshot.seek(0)
+        document = load_snapshot(snapshot)[0][0][0]
+
+        self.assertEqual(logger.warning.call_count, 1)
+        self.assertIn('doc1', logger.warning.call_args[0][0])
+        self.assertEqual(document.references[0].bound_model, None)
+
+    def test_wrong_key(self):
+        from ..snapshot import dump_snapshot, load_snapshot, SnapshotError
+        snapshot = io.BytesIO()
+        dump_snapshot(self.make_binder(), snapshot, key='abc')
+        snapshot.seek(0)
+        with self.assertRaises(SnapshotError):
+            load_snapshot(snapshot, key='def')
+
+        with self.assertRaises(SnapshotError):
+            load_snapshot(io.BytesIO(b'PK\x03\x04 not a snapshot'))
+
+    def test_adapt_epub_cached(self):
+        from ..models import model_to_tree, flatten_to_documents
+        from ..snapshot import adapt_epub_cached, epub_hash
+        epub_filepath = self.pack_epub(os.path.join(TEST_DATA_DIR, 'book'))
+        cache_dir = os.path.join(self.tmpdir, 'cache')
+        os.mkdir(cache_dir)
+
+        binders = adapt_epub_cached(epub_filepath, cache_dir)
+
+        self.assertEqual(os.listdir(cache_dir),
+                         ['{}.snapshot'.format(epub_hash(epub_filepath))])
+
+        with mock.patch('cnxepub.snapshot.adapt_epub') as adapt_epub:
+            cached_binders = adapt_epub_cached(epub_filepath, cache_dir)
+        self.assertFalse(adapt_epub.called)
+
+        self.assertEqual([model_to_tree(b) for b in cached_binders],
+                         [model_to_tree(b) for b in binders])
+        documents = list(flatten_to_documents(binders[0]))
+        cached_documents = list(flatten_to_documents(cached_binders[0]))
+        self.assertEqual([d.content for d in cached_documents],
+                         [d.content for d in documents])
+        self.assertEqual(
+            [[r.uri for r in d.references] for d in cached_documents],
+            [[r.uri for r in d.references] for d in documents])
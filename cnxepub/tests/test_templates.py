@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# ###
+# Copyright (c) 2013, Rice University
+# This software is subject to the provisions of the GNU Affero General
+# Public License version 3 (AGPLv3).
+# See LICENCE.txt for details.
+# ###
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TemplateRegistryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        from .. import templates
+        self.addCleanup(templates._sources.pop, 'test/greeting', None)
+
+    def test_compiled_once(self):
+        from ..templates import register_template, get_template
+        register_template('test/greeting',
+                          "{% if name %}\nhi {{ name }}{% endif %}")
+        template = get_template('test/greeting')
+        self.assertIs(get_template('test/greeting'), template)
+        self.assertEqual(template.render(name='bob'), 'hi bob')
+
+        # Registering again replaces the compiled template.
+        register_template('test/greeting', "bye {{ name }}")
+        self.assertEqual(get_template('test/greeting').render(name='bob'),
+                         'bye bob')
+
+    def test_renderers_share_templates(self):
+        from ..templates import get_template
+        import cnxepub.formatters  # noqa registers the html templates
+        template = get_template('html/document.xhtml')
+        self.assertIs(get_template('html/document.xhtml'), template)
+        self.assertTrue(template.globals['isdict']({}))
+        get_template('epub/package.opf')
+        get_template('epub/container.xml')
+
+    def test_bytecode_cache(self):
+        from ..templates import (
+            register_template, get_template, set_bytecode_cache,
+            )
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        self.addCleanup(set_bytecode_cache, None)
+
+        set_bytecode_cache(cache_dir)
+        register_template('test/greeting', "hi {{ name }}")
+        self.assertEqual(get_template('test/greeting').render(name='bob'),
+                         'hi bob')
+        self.assertEqual(len(os.listdir(cache_dir)), 1)